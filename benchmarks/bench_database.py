@@ -0,0 +1,359 @@
+"""قياس زمن كل دالة عامة في Database على قاعدة بيانات مؤقتة مولدة بحجم محدد.
+
+    python -m benchmarks.bench_database --scale 1k
+    python -m benchmarks.bench_database --scale 100k --iterations 50 --output bench_100k.json
+    python -m benchmarks.bench_database --scale 100k --compare bench_100k.json
+
+cold: أول استدعاء بعد فتح Database من جديد (اتصالات وكاش فارغة؛ كاش نظام الملفات لا يُفرغ).
+warm: الاستدعاءات التالية على نفس الاتصال. النتائج JSON للمقارنة بين commits.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from database import Database
+from benchmarks.datagen import SCALES, Fixture, build, _open_database
+
+
+class Bench:
+    """حالة التشغيل المشتركة بين الحالات: قاعدة البيانات الحالية + البيانات المولدة."""
+
+    def __init__(self, path: str, fixture: Fixture):
+        self.path = path
+        self.fx = fixture
+        self.db: Database | None = None
+        self.work_id: int | None = None
+        self.prepared: list = []
+        self._chapter = 1_000_000
+
+    async def open(self):
+        self.db = _open_database(self.path)
+        await self.db.initialize()
+        self.work_id = self.db.resolve_work_id(self.fx.bench_work)
+
+    async def reopen(self):
+        await self.db.close()
+        await self.open()
+
+    def user(self, i: int) -> int:
+        return self.fx.user_ids[i % len(self.fx.user_ids)]
+
+    def work(self, i: int) -> str:
+        return self.fx.work_names[i % len(self.fx.work_names)]
+
+    def next_chapters(self, n: int = 1) -> list[int]:
+        start = self._chapter
+        self._chapter += n
+        return list(range(start, start + n))
+
+    async def make_tasks(self, count: int, user_id: int = None, submit: bool = False) -> list[tuple[int, int]]:
+        """مهام جديدة على عمل القياس (غير مقاسة) – تُرجع [(user_id, chapter), ...]."""
+        tasks = []
+        for i in range(count):
+            uid = user_id if user_id is not None else self.user(i)
+            (chapter,) = self.next_chapters()
+            await self.db.create_task(uid, "bench", "Bench", self.fx.bench_work, chapter, 5, self.fx.admin_id)
+            if submit:
+                await self.db.submit_task(uid, self.work_id, chapter)
+            tasks.append((uid, chapter))
+        return tasks
+
+
+class Case:
+    """دالة واحدة: call(bench, i) مقاسة، و prepare(bench, n) غير مقاسة قبل إعادة الفتح."""
+
+    def __init__(self, name: str, call, prepare=None):
+        self.name = name
+        self.call = call
+        self.prepare = prepare
+
+
+async def _consume(agen):
+    count = 0
+    async for _ in agen:
+        count += 1
+    return count
+
+
+async def _prepare_tasks(b: Bench, n: int, submit: bool = False):
+    b.prepared = await b.make_tasks(n, submit=submit)
+
+
+async def _prepare_submitted(b: Bench, n: int):
+    await _prepare_tasks(b, n, submit=True)
+
+
+async def _prepare_bulk_users(b: Bench, n: int):
+    # لكل تكرار عضو مختلف لديه 10 مهام مسلمة
+    b.prepared = []
+    for i in range(n):
+        uid = b.user(i)
+        chapters = b.next_chapters(10)
+        await b.db.create_tasks_bulk(uid, "bench", "Bench", b.fx.bench_work, chapters, 5, b.fx.admin_id)
+        for chapter in chapters:
+            await b.db.submit_task(uid, b.work_id, chapter)
+        b.prepared.append(uid)
+
+
+async def _prepare_works(b: Bench, n: int):
+    b.prepared = [f"Bench Delete {i}" for i in range(n)]
+    for name in b.prepared:
+        await b.db.add_work(name, "https://example.com", b.fx.admin_id)
+
+
+async def _prepare_admins(b: Bench, n: int):
+    b.prepared = [900 + i for i in range(n)]
+    for uid in b.prepared:
+        await b.db.add_admin(uid, b.fx.owner_id)
+
+
+def _month_range():
+    end = datetime.utcnow().date()
+    return end - timedelta(days=30), end
+
+
+def _cases() -> list[Case]:
+    today = datetime.utcnow().date()
+    last_month = (today.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+    return [
+        # قراءات
+        Case("get_setting", lambda b, i: b.db.get_setting("owner_id")),
+        Case("get_owner_id", lambda b, i: b.db.get_owner_id()),
+        Case("is_admin", lambda b, i: b.db.is_admin(b.fx.admin_id)),
+        Case("is_admin_cached", lambda b, i: _sync(b.db.is_admin_cached(b.fx.admin_id))),
+        Case("get_admins", lambda b, i: b.db.get_admins()),
+        Case("resolve_work_id", lambda b, i: _sync(b.db.resolve_work_id(b.work(i)))),
+        Case("autocomplete_works", lambda b, i: _sync(b.db.autocomplete_works(b.work(i)[:2]))),
+        Case("get_work_by_name", lambda b, i: b.db.get_work_by_name(b.work(i))),
+        Case("get_work_by_id", lambda b, i: b.db.get_work_by_id(i % len(b.fx.work_names) + 1)),
+        Case("search_works", lambda b, i: b.db.search_works(b.work(i).split()[0][1:4])),
+        Case("get_user_tasks", lambda b, i: b.db.get_user_tasks(b.user(i))),
+        Case("get_user_task_counts", lambda b, i: b.db.get_user_task_counts(b.user(i))),
+        Case("get_user_tasks_page", lambda b, i: b.db.get_user_tasks_page(b.user(i), "approved")),
+        Case("get_user_stats", lambda b, i: b.db.get_user_stats(b.user(i))),
+        Case("get_user_salary", lambda b, i: b.db.get_user_salary(b.user(i))),
+        Case("get_team_stats", lambda b, i: b.db.get_team_stats()),
+        Case("get_leaderboard", lambda b, i: b.db.get_leaderboard(offset=(i % 5) * 10)),
+        Case("get_weekly_report", lambda b, i: b.db.get_weekly_report()),
+        Case("get_report", lambda b, i: b.db.get_report(*_month_range())),
+        Case("export_rows", lambda b, i: _consume(b.db.export_rows("chapters", *_month_range()))),
+        Case("get_pay_periods", lambda b, i: b.db.get_pay_periods()),
+        Case("get_logs", lambda b, i: b.db.get_logs()),
+        Case("get_logs_archived", lambda b, i: b.db.get_logs(last_month)),
+        Case("log_archive_months", lambda b, i: _sync(b.db.log_archive_months())),
+        Case("read_pool_status", lambda b, i: _sync(b.db.read_pool_status())),
+        Case("query_stats_summary", lambda b, i: _sync(b.db.query_stats_summary())),
+        # كتابات
+        Case("set_setting", lambda b, i: b.db.set_setting("bench_key", str(i))),
+        Case("set_owner_id", lambda b, i: b.db.set_owner_id(b.fx.owner_id)),
+        Case("add_admin", lambda b, i: b.db.add_admin(800 + i, b.fx.owner_id)),
+        Case("remove_admin", lambda b, i: b.db.remove_admin(b.prepared[i], b.fx.owner_id), _prepare_admins),
+        Case("add_work", lambda b, i: b.db.add_work(f"Bench New {i}", "https://example.com", b.fx.admin_id)),
+        Case("delete_work", lambda b, i: b.db.delete_work(b.prepared[i], b.fx.admin_id), _prepare_works),
+        Case("create_task", lambda b, i: b.db.create_task(
+            b.user(i), "bench", "Bench", b.fx.bench_work, b.next_chapters()[0], 5, b.fx.admin_id)),
+        Case("create_tasks_bulk", lambda b, i: b.db.create_tasks_bulk(
+            b.user(i), "bench", "Bench", b.fx.bench_work, b.next_chapters(10), 5, b.fx.admin_id)),
+        Case("submit_task", lambda b, i: b.db.submit_task(b.prepared[i][0], b.work_id, b.prepared[i][1]),
+             _prepare_tasks),
+        Case("submit_task_by_name", lambda b, i: b.db.submit_task_by_name(
+            b.prepared[i][0], b.fx.bench_work, b.prepared[i][1]), _prepare_tasks),
+        Case("approve_task", lambda b, i: b.db.approve_task(
+            b.prepared[i][0], b.work_id, b.prepared[i][1], b.fx.admin_id),
+             _prepare_submitted),
+        Case("approve_task_by_name", lambda b, i: b.db.approve_task_by_name(
+            b.prepared[i][0], b.fx.bench_work, b.prepared[i][1], b.fx.admin_id),
+             _prepare_submitted),
+        Case("approve_tasks_bulk", lambda b, i: b.db.approve_tasks_bulk(
+            b.fx.admin_id, work_name=b.fx.bench_work, user_id=b.prepared[i]), _prepare_bulk_users),
+        Case("reject_task", lambda b, i: b.db.reject_task(
+            b.prepared[i][0], b.work_id, b.prepared[i][1], b.fx.admin_id, "bench"), _prepare_submitted),
+        Case("reject_task_by_name", lambda b, i: b.db.reject_task_by_name(
+            b.prepared[i][0], b.fx.bench_work, b.prepared[i][1], b.fx.admin_id, "bench"), _prepare_submitted),
+        # cold هنا هو إغلاق كل التاريخ كفترة واحدة؛ warm بدون فصول جديدة
+        Case("close_pay_period", lambda b, i: b.db.close_pay_period(b.fx.admin_id)),
+        # مدمرة – في النهاية
+        Case("archive_logs", lambda b, i: b.db.archive_logs()),
+        Case("delete_all_logs", lambda b, i: b.db.delete_all_logs(b.fx.admin_id)),
+    ]
+
+
+async def _sync(value):
+    return value
+
+
+def _summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "min_ms": ordered[0] * 1000,
+        "median_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+    }
+
+
+async def _run_case(b: Bench, case: Case, iterations: int) -> dict:
+    if case.prepare:
+        await case.prepare(b, iterations + 1)
+    await b.reopen()
+
+    started = time.perf_counter()
+    await case.call(b, 0)
+    cold = time.perf_counter() - started
+
+    warm = []
+    for i in range(1, iterations + 1):
+        started = time.perf_counter()
+        await case.call(b, i)
+        warm.append(time.perf_counter() - started)
+    return {"method": case.name, "cold_ms": cold * 1000, "warm": _summary(warm)}
+
+
+async def _run_lifecycle(path: str, iterations: int) -> list[dict]:
+    """initialize و close لا يمكن قياسهما كباقي الدوال: كل تكرار فتح وإغلاق كامل."""
+    opens, closes = [], []
+    for _ in range(iterations + 1):
+        db = _open_database(path)
+        started = time.perf_counter()
+        await db.initialize()
+        opened = time.perf_counter()
+        await db.close()
+        opens.append(opened - started)
+        closes.append(time.perf_counter() - opened)
+    return [
+        {"method": "initialize", "cold_ms": opens[0] * 1000, "warm": _summary(opens[1:])},
+        {"method": "close", "cold_ms": closes[0] * 1000, "warm": _summary(closes[1:])},
+    ]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _public_methods() -> set[str]:
+    return {name for name in dir(Database) if not name.startswith("_") and callable(getattr(Database, name))}
+
+
+def _compare(results: list[dict], meta: dict, baseline_path: str, threshold: float):
+    with open(baseline_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    old_meta = previous["meta"]
+    if (old_meta["chapters"], old_meta["seed"]) != (meta["chapters"], meta["seed"]):
+        print(f"⚠️ baseline used {old_meta['chapters']} chapters / seed {old_meta['seed']} – ratios are not comparable")
+    baseline = {r["method"]: r for r in previous["results"]}
+    print(f"\n{'method':<28} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    for r in results:
+        old = baseline.get(r["method"])
+        if not old:
+            continue
+        before, after = old["warm"]["median_ms"], r["warm"]["median_ms"]
+        ratio = after / before if before else float("inf")
+        flag = "  <-- regression" if ratio > threshold else ""
+        print(f"{r['method']:<28} {before:>10.3f} {after:>10.3f} {ratio:>7.2f}{flag}")
+
+
+async def main(args):
+    chapters = SCALES.get(args.scale.lower()) or int(args.scale)
+    # بدون --data-dir تُولد البيانات في مجلد مؤقت يُحذف في النهاية
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="bench_data_")
+    os.makedirs(data_dir, exist_ok=True)
+    pristine = os.path.join(data_dir, f"bench_{chapters}_{args.seed}.db")
+    work_dir = None
+
+    try:
+        started = time.perf_counter()
+        fixture = await build(pristine, chapters, args.seed)
+        print(f"📦 data ready in {time.perf_counter() - started:.1f}s: {chapters} chapters, "
+              f"{fixture.meta['users']} users, {fixture.meta['works']} works")
+
+        # كل تشغيل على نسخة حتى تبقى البيانات الأصلية صالحة لإعادة الاستخدام
+        work_dir = tempfile.mkdtemp(prefix="bench_run_")
+        path = os.path.join(work_dir, "bench.db")
+        shutil.copy2(pristine, path)
+        archive_dir = os.path.join(data_dir, "logs_archive")
+        if os.path.isdir(archive_dir):
+            shutil.copytree(archive_dir, os.path.join(work_dir, "logs_archive"))
+
+        results = await _run_lifecycle(path, args.iterations)
+        b = Bench(path, fixture)
+        await b.open()
+        cases = _cases()
+        if args.only:
+            cases = [c for c in cases if c.name in args.only]
+        for case in cases:
+            result = await _run_case(b, case, args.iterations)
+            results.append(result)
+            print(f"{case.name:<28} cold {result['cold_ms']:>9.3f} ms | "
+                  f"warm median {result['warm']['median_ms']:>9.3f} ms | p95 {result['warm']['p95_ms']:>9.3f} ms")
+        await b.db.close()
+    finally:
+        if not args.keep:
+            if work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            if not args.data_dir:
+                shutil.rmtree(data_dir, ignore_errors=True)
+
+    covered = {r["method"] for r in results}
+    missing = sorted(_public_methods() - covered)
+    if missing and not args.only:
+        print(f"⚠️ not benchmarked: {', '.join(missing)}")
+
+    report = {
+        "meta": {
+            "scale": args.scale,
+            "chapters": chapters,
+            "users": fixture.meta["users"],
+            "works": fixture.meta["works"],
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "not_benchmarked": missing,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"✅ results written to {args.output}")
+
+    if args.compare:
+        _compare(results, report["meta"], args.compare, args.threshold)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Database layer on generated data")
+    parser.add_argument("--scale", default="1k", help="1k, 100k, 1m or a number of chapters")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=20, help="warm calls per method")
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--data-dir", help="reuse generated databases across runs")
+    parser.add_argument("--only", nargs="*", help="benchmark only these methods")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="ratio flagged as regression")
+    parser.add_argument("--keep", action="store_true", help="keep the working copy and generated data")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, stream=sys.stdout)
+    asyncio.run(main(parse_args()))
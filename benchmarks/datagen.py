@@ -0,0 +1,232 @@
+"""مولّد بيانات حتمي لقياس أداء طبقة قاعدة البيانات.
+
+نفس البذرة ونفس الحجم = نفس الصفوف بالضبط (الأوقات نسبية إلى يوم التوليد بتوقيت UTC).
+الجداول تُنشأ عبر Database.initialize() (كل الترحيلات) ثم تُعبأ مباشرة بـ sqlite3 على دفعات.
+"""
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+from database import Database, normalize_name
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+ADMIN_ID = 1
+OWNER_ID = 2
+USER_ID_BASE = 700_000_000_000_000_000
+BENCH_WORK = "Bench Work"
+DAY = 86400
+HISTORY_DAYS = 180
+BATCH = 10_000
+
+_WORDS = ["Tower", "Solo", "Leveling", "God", "Knight", "Return", "Hunter", "Sword", "Academy", "Mage"]
+_ARABIC_WORDS = ["برج", "الإله", "فارس", "عودة", "الصياد", "السيف", "الأكاديمية", "الساحر"]
+_ACTIONS = ["create_task", "create_task_bulk", "submit_task", "reject_task", "add_work", "delete_work"]
+
+
+class Fixture:
+    """ما يحتاجه المقياس من البيانات المولدة: المعرفات والأسماء المتاحة."""
+
+    def __init__(self, meta: dict):
+        self.meta = meta
+        self.chapters = meta["chapters"]
+        self.user_ids = [USER_ID_BASE + i for i in range(meta["users"])]
+        self.work_names = meta["work_names"]
+        self.admin_id = ADMIN_ID
+        self.owner_id = OWNER_ID
+        self.bench_work = BENCH_WORK
+
+
+def _sizes(chapters: int) -> tuple[int, int]:
+    users = max(10, chapters // 500)
+    works = max(5, chapters // 1000)
+    return users, works
+
+
+def _work_name(rng: random.Random, i: int) -> str:
+    if i % 3 == 0:
+        return f"{rng.choice(_ARABIC_WORDS)} {rng.choice(_ARABIC_WORDS)} {i}"
+    return f"{rng.choice(_WORDS)} {rng.choice(_WORDS)} {i}"
+
+
+def _batched(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _populate(path: str, chapters: int, seed: int, anchor: int) -> dict:
+    rng = random.Random(seed)
+    users, works = _sizes(chapters)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    def ts(seconds_ago: int) -> int:
+        return anchor - seconds_ago
+
+    conn.executemany(
+        "INSERT INTO users (user_id, username, display_name, joined_at, is_banned) VALUES (?, ?, ?, ?, 0)",
+        [(USER_ID_BASE + i, f"user{i}", f"User {i}", ts(HISTORY_DAYS * DAY + i), ) for i in range(users)]
+    )
+    work_names = [_work_name(rng, i) for i in range(works)] + [BENCH_WORK]
+    conn.executemany(
+        '''INSERT INTO works (name, link, added_by, created_at, is_active, name_normalized)
+           VALUES (?, ?, ?, ?, 1, ?)''',
+        [(name, f"https://example.com/{i}", ADMIN_ID, ts(HISTORY_DAYS * DAY), normalize_name(name))
+         for i, name in enumerate(work_names)]
+    )
+    conn.executemany(
+        "INSERT INTO admins (user_id, added_by, added_at) VALUES (?, ?, ?)",
+        [(ADMIN_ID, OWNER_ID, ts(HISTORY_DAYS * DAY))]
+    )
+    conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('owner_id', ?)", (str(OWNER_ID),))
+
+    # أرقام الفصول فريدة لكل (عضو، عمل)
+    next_chapter: dict[tuple[int, int], int] = {}
+
+    def allocate(u: int, w: int) -> int:
+        n = next_chapter.get((u, w), 0) + 1
+        next_chapter[(u, w)] = n
+        return n
+
+    def chapter_rows():
+        for _ in range(chapters):
+            u = rng.randrange(users)
+            w = rng.randrange(works) + 1
+            created = ts(rng.randrange(HISTORY_DAYS * DAY))
+            yield (USER_ID_BASE + u, f"user{u}", f"User {u}", w, allocate(u, w), rng.randint(1, 20), created)
+
+    for batch in _batched(chapter_rows()):
+        conn.executemany(
+            '''INSERT INTO chapters (user_id, username, display_name, work_id, chapter, price, approved_by, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+            [(u, name, display, w, c, price, ADMIN_ID, created) for u, name, display, w, c, price, created in batch]
+        )
+        # مهمة معتمدة لكل فصل
+        conn.executemany(
+            '''INSERT INTO tasks (user_id, username, display_name, work_id, chapter, price, status,
+                                  assigned_by, created_at, submitted_at, approved_at, approved_by)
+               VALUES (?, ?, ?, ?, ?, ?, 'approved', ?, ?, ?, ?, ?)''',
+            [(u, name, display, w, c, price, ADMIN_ID, created - 3 * DAY, created - DAY, created, ADMIN_ID)
+             for u, name, display, w, c, price, created in batch]
+        )
+
+    # مهام مفتوحة: 5% في الانتظار، 3% مسلمة، 2% مرفوضة
+    def open_task_rows():
+        for status, share in (("pending", 0.05), ("submitted", 0.03), ("rejected", 0.02)):
+            for _ in range(max(1, int(chapters * share))):
+                u = rng.randrange(users)
+                w = rng.randrange(works) + 1
+                created = ts(rng.randrange(30 * DAY))
+                yield (USER_ID_BASE + u, f"user{u}", f"User {u}", w, allocate(u, w), rng.randint(1, 20), status,
+                       ADMIN_ID, created,
+                       created + DAY if status != "pending" else None,
+                       created + 2 * DAY if status == "rejected" else None,
+                       ADMIN_ID if status == "rejected" else None,
+                       "bench" if status == "rejected" else None)
+
+    for batch in _batched(open_task_rows()):
+        conn.executemany(
+            '''INSERT INTO tasks (user_id, username, display_name, work_id, chapter, price, status,
+                                  assigned_by, created_at, submitted_at, rejected_at, rejected_by, reject_reason)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            batch
+        )
+
+    # سجلات موزعة على الأشهر الماضية (الأرشفة تنقلها عند أول فتح)
+    def log_rows():
+        for _ in range(chapters // 2):
+            seconds_ago = rng.randrange(HISTORY_DAYS * DAY)
+            log_type = "financial" if rng.random() < 0.2 else "normal"
+            action = "financial_approve" if log_type == "financial" else rng.choice(_ACTIONS)
+            stamp = datetime.fromtimestamp(ts(seconds_ago), timezone.utc).replace(tzinfo=None).isoformat()
+            yield (action, str(ADMIN_ID), str(USER_ID_BASE + rng.randrange(users)),
+                   json.dumps({"chapter": rng.randint(1, 500)}), stamp, log_type)
+
+    for batch in _batched(log_rows()):
+        conn.executemany(
+            "INSERT INTO logs (action, user_id, target_id, details, timestamp, type) VALUES (?, ?, ?, ?, ?, ?)",
+            batch
+        )
+
+    # الملخصات التي تحدثها عمليات الكتابة عادة (chapters_daily تحدثه triggers تلقائياً)
+    conn.execute("DELETE FROM user_stats")
+    conn.execute('''
+        INSERT INTO user_stats (user_id, total_earned, chapters_count, pending_tasks, submitted_tasks)
+        SELECT u.user_id, COALESCE(c.total, 0), COALESCE(c.cnt, 0), COALESCE(t.pending, 0), COALESCE(t.submitted, 0)
+        FROM users u
+        LEFT JOIN (SELECT user_id, SUM(price) AS total, COUNT(*) AS cnt FROM chapters GROUP BY user_id) c
+            ON c.user_id = u.user_id
+        LEFT JOIN (SELECT user_id, SUM(status = 'pending') AS pending, SUM(status = 'submitted') AS submitted
+                   FROM tasks GROUP BY user_id) t
+            ON t.user_id = u.user_id
+    ''')
+
+    meta = {
+        "seed": seed,
+        "chapters": chapters,
+        "users": users,
+        "works": works,
+        "anchor": anchor,
+        "work_names": work_names[:-1],
+    }
+    conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('bench_meta', ?)", (json.dumps(meta),))
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return meta
+
+
+def _read_meta(path: str) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute("SELECT value FROM settings WHERE key = 'bench_meta'").fetchone()
+    except sqlite3.Error:
+        row = None
+    finally:
+        conn.close()
+    return json.loads(row[0]) if row else None
+
+
+def _open_database(path: str) -> Database:
+    db = Database()
+    db.db_path = path
+    db.log_archive_dir = os.path.join(os.path.dirname(path), "logs_archive")
+    return db
+
+
+async def build(path: str, chapters: int, seed: int = 42) -> Fixture:
+    """بناء قاعدة بيانات القياس في path (أو إعادة استخدامها إذا كانت مبنية بنفس الحجم والبذرة)."""
+    meta = _read_meta(path)
+    if meta and meta["chapters"] == chapters and meta["seed"] == seed:
+        return Fixture(meta)
+
+    for leftover in (path, path + "-wal", path + "-shm"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+    # المخطط عبر الترحيلات الفعلية
+    db = _open_database(path)
+    await db.initialize()
+    await db.close()
+
+    today = int(time.time()) // DAY * DAY
+    meta = _populate(path, chapters, seed, today)
+
+    # أول فتح ينقل السجلات القديمة إلى ملفات الأرشيف – حالة مستقرة قبل القياس
+    db = _open_database(path)
+    await db.initialize()
+    await db.archive_logs()
+    await db.close()
+    return Fixture(meta)
@@ -1,9 +1,12 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import hashlib
+import json
 import logging
 from config import config
 from database import db
+from notifier import notifier
 
 logger = logging.getLogger(__name__)
 
@@ -17,13 +20,35 @@ class ManhwaBot(commands.Bot):
         super().__init__(command_prefix='!', intents=intents, help_command=None)
 
     async def setup_hook(self):
+        notifier.start(self)
         await self.load_extension("cogs.works")
         await self.load_extension("cogs.tasks")
         await self.load_extension("cogs.earnings")
         await self.load_extension("cogs.admin")
         await self.load_extension("cogs.owner")
+        await self.sync_commands()
+
+    async def close(self):
+        await notifier.close()
+        await super().close()
+
+    def command_tree_hash(self) -> str:
+        """بصمة شجرة الأوامر كما ستُرسل إلى Discord."""
+        payload = [cmd.to_dict(self.tree) for cmd in self.tree.get_commands()]
+        payload.sort(key=lambda c: (c.get("type", 1), c["name"]))
+        data = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    async def sync_commands(self, force: bool = False) -> bool:
+        """مزامنة الأوامر فقط إذا تغيرت البصمة المحفوظة في settings (أو عند الإجبار)."""
+        tree_hash = self.command_tree_hash()
+        if not force and await db.get_setting("command_tree_hash") == tree_hash:
+            logger.info("⏭️ Command tree unchanged, skipping sync")
+            return False
         await self.tree.sync()
+        await db.set_setting("command_tree_hash", tree_hash)
         logger.info("✅ Synced global commands")
+        return True
 
 bot = ManhwaBot()
 
@@ -34,7 +59,7 @@ async def on_ready():
     # تحميل owner_id من قاعدة البيانات إلى config
     owner_id = await db.get_owner_id()
     if owner_id:
-        config.OWNER_ID = int(owner_id)
+        config.OWNER_ID = owner_id
         logger.info(f"👑 Owner loaded from DB: {config.OWNER_ID}")
     else:
         config.OWNER_ID = None
@@ -1,26 +1,65 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import csv
+import io
+import json
 import logging
-from datetime import datetime, timedelta
+import tempfile
+from contextlib import aclosing
+from datetime import date, datetime, timedelta
 from database import db
 from config import config
+from cogs.works import work_autocomplete
 
 logger = logging.getLogger(__name__)
 
 def is_admin():
     async def predicate(interaction: discord.Interaction):
-        try:
-            if await db.is_admin(str(interaction.user.id)):
-                return True
-        except:
-            pass
+        if db.is_admin_cached(interaction.user.id):
+            return True
         if interaction.user.guild_permissions.administrator:
             return True
         await interaction.response.send_message("❌ يحتاج صلاحية أدمن", ephemeral=True)
         return False
     return app_commands.check(predicate)
 
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def parse_date_range(start: str, end: str = None) -> tuple[date, date] | str:
+    """تحويل تاريخين YYYY-MM-DD (النهاية افتراضياً اليوم) – أو رسالة الخطأ للمستخدم."""
+    try:
+        start_date = datetime.strptime(start, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else datetime.utcnow().date()
+    except ValueError:
+        return "❌ صيغة التاريخ غير صحيحة (YYYY-MM-DD)"
+    if start_date > end_date:
+        return "❌ تاريخ البداية بعد تاريخ النهاية"
+    return start_date, end_date
+
+async def write_export(rows, fmt: str, fileobj) -> int:
+    """كتابة صفوف مولّد غير متزامن إلى ملف ثنائي صفاً بصف (CSV أو JSON Lines). تُرجع عدد الصفوف."""
+    count = 0
+    writer = None
+    buffer = io.StringIO()
+    async for row in rows:
+        row = {key: _export_value(value) for key, value in row.items()}
+        if fmt == "jsonl":
+            fileobj.write((json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8"))
+        else:
+            if writer is None:
+                # BOM ليفتح Excel النص العربي بشكل صحيح
+                fileobj.write("\ufeff".encode("utf-8"))
+                writer = csv.DictWriter(buffer, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+            fileobj.write(buffer.getvalue().encode("utf-8"))
+            buffer.seek(0)
+            buffer.truncate()
+        count += 1
+    return count
+
 class AdminCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -43,6 +82,31 @@ class AdminCog(commands.Cog):
             embed.add_field(name="🏆 أفضل 5 أعضاء", value=top_text, inline=False)
         await interaction.followup.send(embed=embed)
 
+    @app_commands.command(name="المتصدرين", description="ترتيب الأعضاء حسب الفصول (أدمن فقط)")
+    @app_commands.describe(scope="الفترة", work="اسم العمل (اختياري)", page="رقم الصفحة")
+    @app_commands.choices(scope=[
+        app_commands.Choice(name="كل الوقت", value="all"),
+        app_commands.Choice(name="آخر 7 أيام", value="weekly"),
+    ])
+    @is_admin()
+    @app_commands.checks.cooldown(1, config.ADMIN_COOLDOWN)
+    @app_commands.autocomplete(work=work_autocomplete)
+    async def leaderboard(self, interaction: discord.Interaction, scope: str = "all", work: str = None, page: int = 1):
+        page = max(page, 1)
+        per_page = 10
+        board = await db.get_leaderboard(scope=scope, work_name=work, offset=(page - 1) * per_page, limit=per_page)
+        if board is None:
+            await interaction.response.send_message("❌ العمل غير موجود", ephemeral=True)
+            return
+        title = f"🏆 المتصدرين – {work}" if work else ("🏆 المتصدرين – آخر 7 أيام" if scope == "weekly" else "🏆 المتصدرين")
+        embed = discord.Embed(title=title, color=discord.Color.gold())
+        if board:
+            embed.description = "\n".join(f"{u['rank']}. {u['display_name']}: {u['count']} فصول (${u['total']})" for u in board)
+        else:
+            embed.description = "📭 لا توجد نتائج في هذه الصفحة"
+        embed.set_footer(text=f"صفحة {page}")
+        await interaction.response.send_message(embed=embed)
+
     @app_commands.command(name="تقرير_اسبوعي", description="تقرير آخر 7 أيام (أدمن فقط)")
     @is_admin()
     @app_commands.checks.cooldown(1, config.ADMIN_COOLDOWN)
@@ -61,13 +125,119 @@ class AdminCog(commands.Cog):
             embed.description = "لا توجد إنجازات هذا الأسبوع"
         await interaction.followup.send(embed=embed)
 
+    @app_commands.command(name="تقرير_فترة", description="تقرير فترة محددة (أدمن فقط)")
+    @app_commands.describe(start="من تاريخ YYYY-MM-DD", end="إلى تاريخ YYYY-MM-DD (افتراضياً اليوم)")
+    @is_admin()
+    @app_commands.checks.cooldown(1, config.ADMIN_COOLDOWN)
+    async def period_report(self, interaction: discord.Interaction, start: str, end: str = None):
+        dates = parse_date_range(start, end)
+        if isinstance(dates, str):
+            await interaction.response.send_message(dates, ephemeral=True)
+            return
+        start_date, end_date = dates
+
+        await interaction.response.defer()
+        report = await db.get_report(start_date, end_date)
+        embed = discord.Embed(
+            title="📆 تقرير الفترة",
+            description=f"من {start_date} إلى {end_date}",
+            color=discord.Color.purple()
+        )
+        if report:
+            for item in report[:25]:
+                embed.add_field(name=item['display_name'] or item['username'], value=f"📚 {item['chapters']} فصول | 💰 ${item['earnings']}", inline=False)
+        else:
+            embed.description += "\nلا توجد إنجازات في هذه الفترة"
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="تصدير", description="تصدير الفصول أو المهام أو الرواتب لفترة كملف (أدمن فقط)")
+    @app_commands.describe(kind="نوع البيانات", fmt="صيغة الملف", start="من تاريخ YYYY-MM-DD", end="إلى تاريخ YYYY-MM-DD (افتراضياً اليوم)")
+    @app_commands.choices(
+        kind=[
+            app_commands.Choice(name="الفصول المعتمدة", value="chapters"),
+            app_commands.Choice(name="المهام", value="tasks"),
+            app_commands.Choice(name="الرواتب", value="payroll"),
+        ],
+        fmt=[
+            app_commands.Choice(name="CSV", value="csv"),
+            app_commands.Choice(name="JSON Lines", value="jsonl"),
+        ],
+    )
+    @is_admin()
+    @app_commands.checks.cooldown(1, config.ADMIN_COOLDOWN)
+    async def export(self, interaction: discord.Interaction, kind: str, start: str, end: str = None, fmt: str = "csv"):
+        dates = parse_date_range(start, end)
+        if isinstance(dates, str):
+            await interaction.response.send_message(dates, ephemeral=True)
+            return
+        start_date, end_date = dates
+
+        await interaction.response.defer(ephemeral=True)
+        # في الذاكرة حتى EXPORT_SPOOL_SIZE ثم على القرص
+        with tempfile.SpooledTemporaryFile(max_size=config.EXPORT_SPOOL_SIZE) as spool:
+            # aclosing: يعيد اتصال القراءة فوراً حتى لو فشلت الكتابة في المنتصف
+            async with aclosing(db.export_rows(kind, start_date, end_date)) as rows:
+                count = await write_export(rows, fmt, spool)
+            if count == 0:
+                await interaction.followup.send("📭 لا توجد بيانات في هذه الفترة", ephemeral=True)
+                return
+            size = spool.tell()
+            limit = interaction.guild.filesize_limit if interaction.guild else discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES
+            if size > limit:
+                await interaction.followup.send(f"❌ الملف كبير جداً ({size // 1024 // 1024}MB)، اختر فترة أقصر", ephemeral=True)
+                return
+            spool.seek(0)
+            filename = f"{kind}_{start_date}_{end_date}.{fmt}"
+            await interaction.followup.send(
+                f"📦 {count} صف",
+                file=discord.File(spool, filename=filename),
+                ephemeral=True
+            )
+
+    @app_commands.command(name="اغلاق_فترة", description="إغلاق فترة الرواتب الحالية وحفظ لقطة لكل عضو (أدمن فقط)")
+    @is_admin()
+    @app_commands.checks.cooldown(1, config.ADMIN_COOLDOWN)
+    async def close_pay_period(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+        period = await db.close_pay_period(interaction.user.id)
+        if period is None:
+            await interaction.followup.send("📭 لا توجد فصول معتمدة منذ آخر إغلاق")
+            return
+        embed = discord.Embed(
+            title=f"🔒 تم إغلاق الفترة #{period['id']}",
+            description=f"من {discord.utils.format_dt(period['start_at'], 'd')} إلى {discord.utils.format_dt(period['end_at'], 'd')}",
+            color=discord.Color.gold()
+        )
+        embed.add_field(name="👥 الأعضاء", value=period["members"], inline=True)
+        embed.add_field(name="📚 الفصول", value=period["chapters"], inline=True)
+        embed.add_field(name="💰 المبلغ", value=f"${period['amount']}", inline=True)
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="فترات_الرواتب", description="آخر فترات الرواتب المغلقة (أدمن فقط)")
+    @is_admin()
+    @app_commands.checks.cooldown(1, config.ADMIN_COOLDOWN)
+    async def pay_periods(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+        periods = await db.get_pay_periods()
+        if not periods:
+            await interaction.followup.send("📭 لم تُغلق أي فترة بعد")
+            return
+        embed = discord.Embed(title="🗂️ فترات الرواتب", color=discord.Color.gold())
+        for p in periods:
+            embed.add_field(
+                name=f"#{p['id']} | {p['end_at']:%Y-%m-%d}",
+                value=f"👥 {p['members']} | 📚 {p['chapters']} | 💰 ${p['amount']}",
+                inline=False
+            )
+        await interaction.followup.send(embed=embed)
+
     @app_commands.command(name="تفاصيل", description="تفاصيل عضو معين (أدمن فقط)")
     @app_commands.describe(member="العضو")
     @is_admin()
     @app_commands.checks.cooldown(1, config.ADMIN_COOLDOWN)
     async def user_details(self, interaction: discord.Interaction, member: discord.Member):
         await interaction.response.defer()
-        stats = await db.get_user_stats(str(member.id))
+        stats = await db.get_user_stats(member.id)
         embed = discord.Embed(title=f"📋 تفاصيل {member.display_name}", color=discord.Color.orange())
         embed.add_field(name="💰 الإجمالي", value=f"${stats['total_earned']}", inline=True)
         embed.add_field(name="📚 عدد الفصول", value=stats['chapters_count'], inline=True)
@@ -15,7 +15,7 @@ class EarningsCog(commands.Cog):
     @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
     async def my_achievements(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        stats = await db.get_user_stats(str(interaction.user.id))
+        stats = await db.get_user_stats(interaction.user.id)
         display_name = stats.get("display_name") or interaction.user.display_name
 
         embed = discord.Embed(title=f"📋 إنجازات {display_name}", color=discord.Color.green())
@@ -34,11 +34,14 @@ class EarningsCog(commands.Cog):
     @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
     async def my_salary(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        stats = await db.get_user_stats(str(interaction.user.id))
-        display_name = stats.get("display_name") or interaction.user.display_name
+        salary = await db.get_user_salary(interaction.user.id)
+        display_name = salary.get("display_name") or interaction.user.display_name
         embed = discord.Embed(title=f"💰 راتب {display_name}", color=discord.Color.gold())
-        embed.add_field(name="الإجمالي", value=f"${stats['total_earned']}", inline=True)
-        embed.add_field(name="عدد الفصول", value=stats['chapters_count'], inline=True)
+        since = f"\nمنذ {discord.utils.format_dt(salary['open_since'], 'd')}" if salary["open_since"] else ""
+        embed.add_field(name="الفترة الحالية", value=f"${salary['open_amount']} | {salary['open_chapters']} فصل{since}", inline=False)
+        if salary["open_since"]:
+            embed.add_field(name="آخر فترة مغلقة", value=f"${salary['last_period_amount']} | {salary['last_period_chapters']} فصل", inline=True)
+            embed.add_field(name="مجموع الفترات المغلقة", value=f"${salary['paid_amount']} | {salary['paid_chapters']} فصل", inline=True)
         await interaction.followup.send(embed=embed)
 
 async def setup(bot):
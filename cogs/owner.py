@@ -3,19 +3,18 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 from database import db
+from notifier import notifier
 from config import config
 
 logger = logging.getLogger(__name__)
 
 def is_owner():
     async def predicate(interaction: discord.Interaction):
-        # نحاول من config أولاً (سريع)، ثم من DB إذا لزم الأمر
+        # نحاول من config أولاً، ثم من كاش قاعدة البيانات (بدون استعلام)
         owner_id = config.OWNER_ID
-        if owner_id is None:
-            owner_id_str = await db.get_owner_id()
-            if owner_id_str:
-                owner_id = int(owner_id_str)
-                config.OWNER_ID = owner_id  # تخزين في الذاكرة للسرعة
+        if owner_id is None and db.owner_id:
+            owner_id = db.owner_id
+            config.OWNER_ID = owner_id
         if owner_id is None:
             await interaction.response.send_message(
                 "⚠️ لا يوجد أونر محدد. استخدم /set_owner لتعيين نفسك.",
@@ -39,7 +38,7 @@ class OwnerCog(commands.Cog):
             await interaction.response.send_message("❌ الأونر محدد مسبقاً.", ephemeral=True)
             return
 
-        await db.set_owner_id(str(interaction.user.id))
+        await db.set_owner_id(interaction.user.id)
         config.OWNER_ID = interaction.user.id
 
         await interaction.response.send_message(
@@ -53,7 +52,7 @@ class OwnerCog(commands.Cog):
     @app_commands.describe(member="العضو المراد إضافته")
     async def add_admin(self, interaction: discord.Interaction, member: discord.Member):
         await interaction.response.defer(ephemeral=True)
-        success = await db.add_admin(str(member.id), str(interaction.user.id))
+        success = await db.add_admin(member.id, interaction.user.id)
         if success:
             await interaction.followup.send(f"✅ تمت إضافة {member.mention} كأدمن في البوت.", ephemeral=True)
         else:
@@ -64,7 +63,7 @@ class OwnerCog(commands.Cog):
     @app_commands.describe(member="العضو المراد إزالته")
     async def remove_admin(self, interaction: discord.Interaction, member: discord.Member):
         await interaction.response.defer(ephemeral=True)
-        success = await db.remove_admin(str(member.id), str(interaction.user.id))
+        success = await db.remove_admin(member.id, interaction.user.id)
         if success:
             await interaction.followup.send(f"✅ تمت إزالة {member.mention} من قائمة الأدمن.", ephemeral=True)
         else:
@@ -80,18 +79,45 @@ class OwnerCog(commands.Cog):
             return
         embed = discord.Embed(title="👥 قائمة الأدمن", color=discord.Color.blue())
         for admin in admins:
-            user = self.bot.get_user(int(admin["user_id"]))
+            user = self.bot.get_user(admin["user_id"])
             name = user.name if user else f"Unknown ({admin['user_id']})"
-            embed.add_field(name=name, value=f"منذ: {admin['added_at']}", inline=False)
+            embed.add_field(name=name, value=f"منذ: {discord.utils.format_dt(admin['added_at'], 'R')}", inline=False)
         await interaction.followup.send(embed=embed, ephemeral=True)
 
     @app_commands.command(name="حذف_السجلات", description="حذف جميع السجلات (الأونر فقط)")
     @is_owner()
     async def delete_logs(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
-        await db.delete_all_logs(str(interaction.user.id))
+        await db.delete_all_logs(interaction.user.id)
         await interaction.followup.send("✅ تم حذف جميع السجلات (ما عدا المالية)", ephemeral=True)
 
+    @app_commands.command(name="اداء_الاستعلامات", description="زمن استعلامات قاعدة البيانات (الأونر فقط)")
+    @is_owner()
+    async def query_stats(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        summary = db.query_stats_summary()
+        if not summary:
+            await interaction.followup.send("📭 لا توجد قياسات بعد.", ephemeral=True)
+            return
+        lines = [
+            f"`{s['name'][:32]}` ×{s['count']} | p50 {s['p50_ms']:.1f} | p95 {s['p95_ms']:.1f} | p99 {s['p99_ms']:.1f} ms | صفوف {s['avg_rows']:.1f}"
+            for s in summary[:20]
+        ]
+        embed = discord.Embed(title="⏱️ أداء الاستعلامات (الأبطأ أولاً)", description="\n".join(lines)[:4000], color=discord.Color.blue())
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="مزامنة_الاوامر", description="إجبار مزامنة أوامر البوت مع Discord (الأونر فقط)")
+    @is_owner()
+    async def sync_commands(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            await self.bot.sync_commands(force=True)
+        except Exception as e:
+            logger.error(f"Error syncing commands: {e}")
+            await interaction.followup.send("❌ فشلت المزامنة", ephemeral=True)
+            return
+        await interaction.followup.send("✅ تمت مزامنة الأوامر", ephemeral=True)
+
     @app_commands.command(name="حالة_البوت", description="عرض حالة البوت (الأونر فقط)")
     @is_owner()
     async def status_command(self, interaction: discord.Interaction):
@@ -99,11 +125,11 @@ class OwnerCog(commands.Cog):
 
         # استخدام دوال DB للقراءة (بدون قفل)
         try:
-            users_count = (await db._fetchone("SELECT COUNT(*) FROM users"))[0]
-            works_count = (await db._fetchone("SELECT COUNT(*) FROM works WHERE is_active = 1"))[0]
-            tasks_count = (await db._fetchone("SELECT COUNT(*) FROM tasks"))[0]
-            chapters_count = (await db._fetchone("SELECT COUNT(*) FROM chapters"))[0]
-            logs_count = (await db._fetchone("SELECT COUNT(*) FROM logs"))[0]
+            users_count = (await db._fetchone("SELECT COUNT(*) FROM users", name="status_count_users"))[0]
+            works_count = (await db._fetchone("SELECT COUNT(*) FROM works WHERE is_active = 1", name="status_count_works"))[0]
+            tasks_count = (await db._fetchone("SELECT COUNT(*) FROM tasks", name="status_count_tasks"))[0]
+            chapters_count = (await db._fetchone("SELECT COUNT(*) FROM chapters", name="status_count_chapters"))[0]
+            logs_count = (await db._fetchone("SELECT COUNT(*) FROM logs", name="status_count_logs"))[0]
         except Exception as e:
             logger.error(f"Error getting counts: {e}")
             users_count = works_count = tasks_count = chapters_count = logs_count = 0
@@ -117,6 +143,20 @@ class OwnerCog(commands.Cog):
         embed.add_field(name="✅ الفصول", value=chapters_count, inline=True)
         embed.add_field(name="📝 السجلات", value=logs_count, inline=True)
 
+        pool = db.read_pool_status()
+        embed.add_field(
+            name="🔌 اتصالات القراءة",
+            value=f"{pool['size']} ({pool['idle']} خامل) | سحب: {pool['checkouts']} | انتظار: {pool['waits']}",
+            inline=False
+        )
+
+        dm = notifier.status()
+        embed.add_field(
+            name="✉️ الرسائل الخاصة",
+            value=f"في الانتظار: {dm['pending']} | أُرسلت: {dm['sent']} | إعادة: {dm['retried']} | فشلت: {dm['failed']} | أُسقطت: {dm['dropped']}",
+            inline=False
+        )
+
         await interaction.followup.send(embed=embed, ephemeral=True)
 
 async def setup(bot):
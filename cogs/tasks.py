@@ -3,17 +3,16 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 from database import db
+from notifier import notifier
 from config import config
+from cogs.works import work_autocomplete
 
 logger = logging.getLogger(__name__)
 
 def is_admin():
     async def predicate(interaction: discord.Interaction):
-        try:
-            if await db.is_admin(str(interaction.user.id)):
-                return True
-        except:
-            pass
+        if db.is_admin_cached(interaction.user.id):
+            return True
         if interaction.user.guild_permissions.administrator:
             return True
         if not interaction.response.is_done():
@@ -21,6 +20,125 @@ def is_admin():
         return False
     return app_commands.check(predicate)
 
+def parse_chapters(text: str) -> list[int] | None:
+    """تحويل نص مثل "1-10, 15, 20-22" إلى قائمة فصول (None إذا كان غير صالح).
+
+    إذا تجاوز العدد MAX_BULK_CHAPTERS تُرجع قائمة أطول من الحد ليرفضها الأمر برسالة الحد.
+    """
+    chapters = set()
+    for part in text.replace("،", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                start, end = (int(x) for x in part.split("-", 1))
+                if start > end:
+                    return None
+                # نطاق أكبر من الحد يُوسّع حتى الحد + 1 فقط (بدون حجز ذاكرة لنطاق ضخم)،
+                # فيظهر للمستخدم رسالة الحد الأقصى بدلاً من "صيغة غير صحيحة"
+                chapters.update(range(start, min(end, start + config.MAX_BULK_CHAPTERS) + 1))
+            else:
+                chapters.add(int(part))
+        except ValueError:
+            return None
+    return sorted(chapters) if chapters else None
+
+def format_chapters(chapters: list[int]) -> str:
+    """عرض الفصول كنطاقات مختصرة: [1, 2, 3, 7] -> "1-3, 7"."""
+    ranges = []
+    for c in sorted(chapters):
+        if ranges and c == ranges[-1][1] + 1:
+            ranges[-1][1] = c
+        else:
+            ranges.append([c, c])
+    return ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+# حدود Discord للـ embed الواحد
+EMBED_MAX_FIELDS = 25
+EMBED_MAX_CHARS = 6000
+
+TASK_STATUSES = {
+    "pending": "⏳ في الانتظار",
+    "submitted": "✅ مسلمة",
+    "approved": "💰 معتمدة",
+    "rejected": "❌ مرفوضة",
+}
+
+class TasksPager(discord.ui.View):
+    """تصفح مهام العضو صفحة بصفحة – كل ضغطة تجلب صفحة واحدة فقط من قاعدة البيانات."""
+
+    def __init__(self, member: discord.abc.User, counts: dict[str, int]):
+        super().__init__(timeout=180)
+        self.member = member
+        self.counts = counts
+        self.status = next((s for s in TASK_STATUSES if counts.get(s)), "pending")
+        self.cursors = [None]  # مؤشر بداية كل صفحة تمت زيارتها
+        self.tasks = []
+        self.next_cursor = None
+        self.message = None
+        for status, label in TASK_STATUSES.items():
+            button = discord.ui.Button(label=f"{label} ({counts.get(status, 0)})", row=0, custom_id=status)
+            button.callback = self.switch_status
+            self.add_item(button)
+
+    async def load(self):
+        self.tasks, self.next_cursor = await db.get_user_tasks_page(
+            self.member.id, self.status, after=self.cursors[-1], limit=config.TASKS_PAGE_SIZE
+        )
+        for item in self.children:
+            if item.custom_id in TASK_STATUSES:
+                item.style = discord.ButtonStyle.primary if item.custom_id == self.status else discord.ButtonStyle.secondary
+        self.previous_page.disabled = len(self.cursors) == 1
+        self.next_page.disabled = self.next_cursor is None
+
+    def embed(self) -> discord.Embed:
+        embed = discord.Embed(title=f"📋 مهام {self.member.display_name}", color=discord.Color.blue())
+        if self.tasks:
+            lines = [f"• {t['work_name']} فصل {t['chapter']} (${t['price']})" for t in self.tasks]
+        else:
+            lines = ["📭 لا يوجد مهام"]
+        embed.add_field(name=TASK_STATUSES[self.status], value="\n".join(lines)[:1024], inline=False)
+        pages = max(1, -(-self.counts.get(self.status, 0) // config.TASKS_PAGE_SIZE))
+        embed.set_footer(text=f"صفحة {len(self.cursors)} من {pages}")
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.member.id:
+            await interaction.response.send_message("❌ هذه القائمة ليست لك", ephemeral=True)
+            return False
+        return True
+
+    async def refresh(self, interaction: discord.Interaction):
+        await self.load()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    async def switch_status(self, interaction: discord.Interaction):
+        self.status = interaction.data["custom_id"]
+        self.cursors = [None]
+        await self.refresh(interaction)
+
+    @discord.ui.button(label="◀", row=1)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        await self.refresh(interaction)
+
+    @discord.ui.button(label="▶", row=1)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.next_cursor is not None:
+            self.cursors.append(self.next_cursor)
+        await self.refresh(interaction)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
 class TasksCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -29,6 +147,7 @@ class TasksCog(commands.Cog):
     @app_commands.describe(member="العضو", work="اسم العمل", chapter="رقم الفصل", price="السعر بالدولار")
     @is_admin()
     @app_commands.checks.cooldown(1, config.ADMIN_COOLDOWN)
+    @app_commands.autocomplete(work=work_autocomplete)
     async def assign_task(self, interaction: discord.Interaction, member: discord.Member, work: str, chapter: int, price: int):
         if price <= 0:
             await interaction.response.send_message("❌ السعر يجب أن يكون أكبر من 0", ephemeral=True)
@@ -43,50 +162,86 @@ class TasksCog(commands.Cog):
         await interaction.response.defer()
 
         success, message = await db.create_task(
-            user_id=str(member.id),
+            user_id=member.id,
             username=member.name,
             display_name=member.display_name,
             work_name=work,
             chapter=chapter,
             price=price,
-            assigned_by=str(interaction.user.id)
+            assigned_by=interaction.user.id
         )
 
         if success:
             embed = discord.Embed(title="📋 مهمة جديدة", description=f"**العمل:** {work}\n**الفصل:** {chapter}\n**السعر:** ${price}", color=discord.Color.green())
             await interaction.followup.send(f"✅ {member.mention}", embed=embed)
-            try:
-                await member.send(f"📢 مهمة جديدة: {work} فصل {chapter} بسعر ${price}")
-            except:
-                pass
+            notifier.notify(member.id, f"📢 مهمة جديدة: {work} فصل {chapter} بسعر ${price}")
         else:
             await interaction.followup.send(message)
 
+    @app_commands.command(name="تكليف_متعدد", description="تكليف عضو بعدة فصول دفعة واحدة (أدمن فقط)")
+    @app_commands.describe(member="العضو", work="اسم العمل", chapters="الفصول مثل 1-10 أو 1,3,5", price="السعر لكل فصل بالدولار")
+    @is_admin()
+    @app_commands.checks.cooldown(1, config.ADMIN_COOLDOWN)
+    @app_commands.autocomplete(work=work_autocomplete)
+    async def assign_tasks_bulk(self, interaction: discord.Interaction, member: discord.Member, work: str, chapters: str, price: int):
+        if price <= 0:
+            await interaction.response.send_message("❌ السعر يجب أن يكون أكبر من 0", ephemeral=True)
+            return
+        if price > config.MAX_PRICE:
+            await interaction.response.send_message(f"❌ السعر كبير جداً (الحد الأقصى {config.MAX_PRICE})", ephemeral=True)
+            return
+        chapter_list = parse_chapters(chapters)
+        if not chapter_list or chapter_list[0] <= 0:
+            await interaction.response.send_message("❌ صيغة الفصول غير صالحة (مثال: 1-10 أو 1,3,5)", ephemeral=True)
+            return
+        if len(chapter_list) > config.MAX_BULK_CHAPTERS:
+            await interaction.response.send_message(f"❌ عدد الفصول كبير جداً (الحد الأقصى {config.MAX_BULK_CHAPTERS})", ephemeral=True)
+            return
+
+        await interaction.response.defer()
+
+        success, message, created, conflicts = await db.create_tasks_bulk(
+            user_id=member.id,
+            username=member.name,
+            display_name=member.display_name,
+            work_name=work,
+            chapters=chapter_list,
+            price=price,
+            assigned_by=interaction.user.id
+        )
+
+        if not success:
+            if conflicts:
+                message += f"\n**مكلفة مسبقاً:** {format_chapters(conflicts)}"
+            await interaction.followup.send(message)
+            return
+
+        description = f"**العمل:** {work}\n**الفصول:** {format_chapters(created)} ({len(created)})\n**السعر:** ${price} لكل فصل"
+        embed = discord.Embed(title="📋 مهام جديدة", description=description, color=discord.Color.green())
+        if conflicts:
+            embed.add_field(name="⚠️ مكلفة مسبقاً", value=format_chapters(conflicts), inline=False)
+        await interaction.followup.send(f"✅ {member.mention}", embed=embed)
+        notifier.notify(member.id, f"📢 مهام جديدة: {work} فصول {format_chapters(created)} بسعر ${price} لكل فصل")
+
     @app_commands.command(name="مهماتي", description="عرض مهامي")
     @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
     async def my_tasks(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        tasks = await db.get_user_tasks(str(interaction.user.id))
-        if not tasks:
+        counts = await db.get_user_task_counts(interaction.user.id)
+        if not counts:
             await interaction.followup.send("📭 لا يوجد مهام")
             return
-        embed = discord.Embed(title=f"📋 مهام {interaction.user.display_name}", color=discord.Color.blue())
-        pending = [t for t in tasks if t['status'] == 'pending']
-        submitted = [t for t in tasks if t['status'] == 'submitted']
-        if pending:
-            text = "\n".join([f"• {t['work_name']} فصل {t['chapter']} (${t['price']})" for t in pending[:5]])
-            embed.add_field(name="⏳ في الانتظار", value=text, inline=False)
-        if submitted:
-            text = "\n".join([f"• {t['work_name']} فصل {t['chapter']}" for t in submitted[:5]])
-            embed.add_field(name="✅ مسلمة", value=text, inline=False)
-        await interaction.followup.send(embed=embed)
+        view = TasksPager(interaction.user, counts)
+        await view.load()
+        view.message = await interaction.followup.send(embed=view.embed(), view=view)
 
     @app_commands.command(name="تسليم", description="تسليم مهمة")
     @app_commands.describe(work="اسم العمل", chapter="رقم الفصل")
     @app_commands.checks.cooldown(1, config.COMMAND_COOLDOWN)
+    @app_commands.autocomplete(work=work_autocomplete)
     async def submit_task(self, interaction: discord.Interaction, work: str, chapter: int):
         await interaction.response.defer()
-        success = await db.submit_task_by_name(str(interaction.user.id), work, chapter)
+        success = await db.submit_task_by_name(interaction.user.id, work, chapter)
         if success:
             await interaction.followup.send(f"✅ تم تسليم {work} فصل {chapter}")
         else:
@@ -96,32 +251,87 @@ class TasksCog(commands.Cog):
     @app_commands.describe(member="العضو", work="اسم العمل", chapter="رقم الفصل")
     @is_admin()
     @app_commands.checks.cooldown(1, config.ADMIN_COOLDOWN)
+    @app_commands.autocomplete(work=work_autocomplete)
     async def approve_task(self, interaction: discord.Interaction, member: discord.Member, work: str, chapter: int):
         await interaction.response.defer()
-        task = await db.approve_task_by_name(str(member.id), work, chapter, str(interaction.user.id))
+        task = await db.approve_task_by_name(member.id, work, chapter, interaction.user.id)
         if task:
             embed = discord.Embed(title="✅ تم الاعتماد", description=f"**{work} فصل {chapter}**\n💰 ${task['price']}", color=discord.Color.green())
             await interaction.followup.send(embed=embed)
-            try:
-                await member.send(f"✅ تم اعتماد {work} فصل {chapter} (💰 ${task['price']})")
-            except:
-                pass
+            notifier.notify(member.id, f"✅ تم اعتماد {work} فصل {chapter} (💰 ${task['price']})")
         else:
             await interaction.followup.send("❌ لم يتم العثور على المهمة أو العمل غير صحيح")
 
+    @app_commands.command(name="اعتماد_الكل", description="اعتماد كل المهام المسلمة لعمل و/أو عضو (أدمن فقط)")
+    @app_commands.describe(work="اسم العمل (اختياري)", member="العضو (اختياري)")
+    @is_admin()
+    @app_commands.checks.cooldown(1, config.ADMIN_COOLDOWN)
+    @app_commands.autocomplete(work=work_autocomplete)
+    async def approve_all(self, interaction: discord.Interaction, work: str = None, member: discord.Member = None):
+        if work is None and member is None:
+            await interaction.response.send_message("❌ حدد عملاً أو عضواً على الأقل", ephemeral=True)
+            return
+
+        await interaction.response.defer()
+        try:
+            result = await db.approve_tasks_bulk(
+                interaction.user.id,
+                work_name=work,
+                user_id=member.id if member else None
+            )
+        except Exception as e:
+            logger.error(f"Error in approve_all: {e}")
+            await interaction.followup.send("❌ حدث خطأ في قاعدة البيانات، لم يتم اعتماد أي مهمة")
+            return
+        if result is None:
+            await interaction.followup.send("❌ العمل غير موجود")
+            return
+        approved, skipped = result
+        if not approved:
+            if skipped:
+                await interaction.followup.send(f"📭 لا توجد مهام جديدة للاعتماد – تم تخطي {len(skipped)} مهمة لأن الفصل معتمد مسبقاً")
+            else:
+                await interaction.followup.send("📭 لا توجد مهام مسلمة مطابقة")
+            return
+
+        # تجميع حسب العضو ثم حسب العمل
+        by_user = {}
+        for task in approved:
+            by_user.setdefault(task["user_id"], {}).setdefault(task["work_name"], []).append(task)
+
+        total = sum(t["price"] for t in approved)
+        embed = discord.Embed(title="✅ تم الاعتماد", description=f"**{len(approved)} فصل** | 💰 ${total}", color=discord.Color.green())
+        if skipped:
+            embed.set_footer(text=f"⚠️ تم تخطي {len(skipped)} مهمة لأن الفصل معتمد مسبقاً")
+        # الاعتماد تم فعلاً – لا نتجاوز حدود Discord (25 حقلاً و 6000 حرف) حتى لا يفشل الرد
+        shown = 0
+        for user_id, works in by_user.items():
+            lines = [f"• {name} فصول {format_chapters([t['chapter'] for t in tasks])} (${sum(t['price'] for t in tasks)})" for name, tasks in works.items()]
+            name = str(next(iter(works.values()))[0]["display_name"] or user_id)[:256]
+            value = "\n".join(lines)[:1024]
+            if len(embed.fields) >= EMBED_MAX_FIELDS - 1 or len(embed) + len(name) + len(value) > EMBED_MAX_CHARS - 100:
+                break
+            embed.add_field(name=name, value=value, inline=False)
+            shown += 1
+        if shown < len(by_user):
+            embed.add_field(name="…", value=f"و {len(by_user) - shown} أعضاء آخرين", inline=False)
+        await interaction.followup.send(embed=embed)
+
+        for user_id, works in by_user.items():
+            lines = [f"{name} فصول {format_chapters([t['chapter'] for t in tasks])} (💰 ${sum(t['price'] for t in tasks)})" for name, tasks in works.items()]
+            notifier.notify(user_id, "✅ تم اعتماد:\n" + "\n".join(lines))
+
     @app_commands.command(name="رفض", description="رفض مهمة (أدمن فقط)")
     @app_commands.describe(member="العضو", work="اسم العمل", chapter="رقم الفصل", reason="السبب")
     @is_admin()
     @app_commands.checks.cooldown(1, config.ADMIN_COOLDOWN)
+    @app_commands.autocomplete(work=work_autocomplete)
     async def reject_task(self, interaction: discord.Interaction, member: discord.Member, work: str, chapter: int, reason: str):
         await interaction.response.defer()
-        success = await db.reject_task_by_name(str(member.id), work, chapter, str(interaction.user.id), reason)
+        success = await db.reject_task_by_name(member.id, work, chapter, interaction.user.id, reason)
         if success:
             await interaction.followup.send(f"❌ تم رفض {work} فصل {chapter}\nالسبب: {reason}")
-            try:
-                await member.send(f"❌ تم رفض {work} فصل {chapter}\nالسبب: {reason}")
-            except:
-                pass
+            notifier.notify(member.id, f"❌ تم رفض {work} فصل {chapter}\nالسبب: {reason}")
         else:
             await interaction.followup.send("❌ لم يتم العثور على المهمة أو العمل غير صحيح")
 
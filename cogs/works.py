@@ -8,11 +8,8 @@ logger = logging.getLogger(__name__)
 
 def is_admin():
     async def predicate(interaction: discord.Interaction):
-        try:
-            if await db.is_admin(str(interaction.user.id)):
-                return True
-        except:
-            pass
+        if db.is_admin_cached(interaction.user.id):
+            return True
         if interaction.user.guild_permissions.administrator:
             return True
         if not interaction.response.is_done():
@@ -20,6 +17,10 @@ def is_admin():
         return False
     return app_commands.check(predicate)
 
+async def work_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    """إكمال تلقائي لأسماء الأعمال من الفهرس في الذاكرة (يُستدعى مع كل حرف)."""
+    return [app_commands.Choice(name=name[:100], value=name[:100]) for name in db.autocomplete_works(current)]
+
 class WorksCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -30,7 +31,7 @@ class WorksCog(commands.Cog):
     async def add_work(self, interaction: discord.Interaction, name: str, link: str):
         await interaction.response.defer()
         try:
-            success, message = await db.add_work(name, link, str(interaction.user.id))
+            success, message = await db.add_work(name, link, interaction.user.id)
             embed = discord.Embed(title="✅ تمت الإضافة" if success else "❌ فشل", description=message, color=discord.Color.green() if success else discord.Color.red())
             await interaction.followup.send(embed=embed)
         except Exception as e:
@@ -39,6 +40,7 @@ class WorksCog(commands.Cog):
 
     @app_commands.command(name="بحث", description="البحث عن عمل")
     @app_commands.describe(name="اسم العمل")
+    @app_commands.autocomplete(name=work_autocomplete)
     async def search_work(self, interaction: discord.Interaction, name: str):
         await interaction.response.defer()
         try:
@@ -62,10 +64,11 @@ class WorksCog(commands.Cog):
     @app_commands.command(name="حذف_عمل", description="حذف عمل (أدمن فقط)")
     @app_commands.describe(name="اسم العمل")
     @is_admin()
+    @app_commands.autocomplete(name=work_autocomplete)
     async def delete_work(self, interaction: discord.Interaction, name: str):
         await interaction.response.defer()
         try:
-            success = await db.delete_work(name, str(interaction.user.id))
+            success = await db.delete_work(name, interaction.user.id)
             if success:
                 await interaction.followup.send(f"✅ تم حذف **{name}**")
             else:
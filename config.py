@@ -13,5 +13,8 @@ class Config:
     COMMAND_COOLDOWN = 3
     ADMIN_COOLDOWN = 2
     MAX_PRICE = 10000
+    MAX_BULK_CHAPTERS = 100
+    TASKS_PAGE_SIZE = 10
+    EXPORT_SPOOL_SIZE = 5 * 1024 * 1024
 
 config = Config()
@@ -1,25 +1,153 @@
 import aiosqlite
 import asyncio
+import bisect
 import logging
-from datetime import datetime, timedelta
+from contextlib import aclosing
+from datetime import date, datetime, timedelta, timezone
 import json
 import os
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+
+from leaderboard import Leaderboard
 
 logger = logging.getLogger(__name__)
 
+# التشكيل + التطويل
+_ARABIC_MARKS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_ARABIC_FOLD = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ة": "ه", "ى": "ي", "ؤ": "و", "ئ": "ي",
+})
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """توحيد اسم العمل للبحث: حالة الأحرف، التشكيل، أشكال الألف والهمزة، التاء المربوطة."""
+    name = unicodedata.normalize("NFKC", name).casefold()
+    name = _ARABIC_MARKS.sub("", name).translate(_ARABIC_FOLD)
+    return _SPACES.sub(" ", name).strip()
+
+
+def _epoch_to_datetime(value: bytes) -> datetime:
+    return datetime.fromtimestamp(int(value), timezone.utc)
+
+
+# أعمدة الوقت المعلنة EPOCH تُقرأ كـ datetime (UTC) وتُكتب كثوانٍ صحيحة
+sqlite3.register_converter("EPOCH", _epoch_to_datetime)
+
+
+class LatencyStats:
+    """عداد زمني خفيف: إجماليات + نافذة دائرية لآخر العينات لحساب النسب المئوية."""
+
+    __slots__ = ("count", "total", "rows", "samples", "_next")
+    WINDOW = 1024
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.rows = 0
+        self.samples = []
+        self._next = 0
+
+    def add(self, seconds: float, rows: int = 0):
+        self.count += 1
+        self.total += seconds
+        self.rows += rows
+        if len(self.samples) < self.WINDOW:
+            self.samples.append(seconds)
+        else:
+            self.samples[self._next] = seconds
+            self._next = (self._next + 1) % self.WINDOW
+
+    def summary(self) -> dict:
+        ordered = sorted(self.samples)
+
+        def pct(p):
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+        return {
+            "count": self.count,
+            "avg_ms": (self.total / self.count * 1000) if self.count else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "avg_rows": (self.rows / self.count) if self.count else 0.0,
+        }
+
+
+class _Rollback(Exception):
+    """تُرفع داخل عملية كتابة للتراجع عن نقطة الحفظ الخاصة بها مع إرجاع قيمة للمستدعي."""
+
+    def __init__(self, result=None):
+        super().__init__()
+        self.result = result
+
+
 class Database:
     def __init__(self):
         self.db_path = "bot_database.db"
         self.write_conn = None
-        self.read_pool_size = 5
+        # Pool قراءة متكيف: يبدأ بالحد الأدنى ويكبر عند الانتظار ويصغر عند الخمول
+        self.read_pool_min = 2
+        self.read_pool_max = 8
+        self.read_pool_grow_wait = 0.05      # ثوانٍ انتظار قبل فتح اتصال جديد
+        self.read_pool_idle_timeout = 300    # ثوانٍ خمول قبل إغلاق اتصال زائد
+        self.read_pool_reap_interval = 60
         self.read_queue = asyncio.Queue()
         self._read_conns = []                # للتنظيف عند الفشل
-        self.write_lock = asyncio.Lock()
+        self._read_idle_since = {}
+        self._read_opening = 0
+        self._read_reaper_task = None
+        self.read_pool_stats = {"checkouts": 0, "waits": 0, "opened": 0, "closed": 0}
+
+        # كاش تقرير الفريق: يُبطل مع كل كتابة تؤثر عليه، وبحد أقصى TTL
+        self.team_stats_ttl = 60
+        self._team_stats_version = 0
+        self._team_stats_cache = None        # (version, computed_at, stats)
+        self._team_stats_inflight = None     # (version, task)
+
+        # لوحة المتصدرين في الذاكرة: كل الوقت + لكل عمل + سلال يومية للأسبوع
+        self.leaderboard = Leaderboard()
+        self.work_leaderboards: dict[int, Leaderboard] = {}
+        self._daily_scores: dict[str, dict[int, list[int]]] = {}
+        self.user_names: dict[int, tuple[str, str]] = {}
+
+        # أرشيف السجلات الشهري: ملف SQLite لكل شهر (السجلات غير المالية فقط)
+        self.log_archive_dir = "logs_archive"
+        self.log_retention_months = 12
+        self.log_archive_interval = 3600
+        self.log_archive_chunk = 5000
+        self._log_archiver_task = None
+
+        # قياس زمن الاستعلامات حسب اسم ثابت (اسم الدالة المستدعية افتراضياً)
+        self.query_stats: dict[str, LatencyStats] = {}
+        self.write_queue = asyncio.Queue()   # خط الكتابة (group commit)
+        self.write_batch_size = 64
+        self.write_worker_task = None
         self.init_lock = asyncio.Lock()
         self.log_queue = asyncio.Queue(maxsize=2000)
         self.log_worker_task = None
         self.initialized = False
 
+        # كاش الصلاحيات (يُحمّل عند التهيئة ويُحدّث مع كل كتابة)
+        self.admin_ids: set[int] = set()
+        self.owner_id: int | None = None
+
+        # كاش أسماء الأعمال النشطة: الاسم (بدون حالة الأحرف) -> work_id
+        self.work_ids: dict[str, int] = {}
+        # فهرس بادئات مرتب للإكمال التلقائي: المفاتيح مرتبة + الاسم الأصلي لكل مفتاح
+        self.work_keys: list[str] = []
+        self.work_names: dict[str, str] = {}
+
+        # FTS5 (trigram) للبحث داخل أسماء الأعمال – يُعطّل إذا لم تدعمه نسخة SQLite
+        self.fts_enabled = False
+
     # -----------------------------------------------------------
     # التهيئة والإغلاق
     # -----------------------------------------------------------
@@ -30,7 +158,7 @@ class Database:
 
             try:
                 # إنشاء اتصال الكتابة
-                self.write_conn = await aiosqlite.connect(self.db_path)
+                self.write_conn = await aiosqlite.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES)
                 await self.write_conn.execute("PRAGMA foreign_keys = ON;")
                 await self.write_conn.execute("PRAGMA journal_mode = WAL;")
                 await self.write_conn.execute("PRAGMA busy_timeout = 5000;")
@@ -40,20 +168,26 @@ class Database:
                 await self.write_conn.execute("PRAGMA wal_autocheckpoint = 1000;")
                 self.write_conn.row_factory = aiosqlite.Row
 
-                # إنشاء اتصالات القراءة (بدون WAL – غير ضروري)
-                for _ in range(self.read_pool_size):
-                    conn = await aiosqlite.connect(self.db_path)
-                    await conn.execute("PRAGMA busy_timeout = 5000;")
-                    await conn.execute("PRAGMA synchronous = NORMAL;")
-                    conn.row_factory = aiosqlite.Row
-                    self._read_conns.append(conn)
-                    await self.read_queue.put(conn)
+                # إنشاء اتصالات القراءة بالتوازي (بدون WAL – غير ضروري)
+                conns = await asyncio.gather(
+                    *(self._open_read_conn() for _ in range(self.read_pool_min))
+                )
+                for conn in conns:
+                    self._release_read_conn_nowait(conn)
+
+                # تشغيل الترحيلات المعلقة فقط
+                await self._migrate()
 
-                # إنشاء الجداول والفهارس
-                await self._create_tables()
+                # تحميل الصلاحيات إلى الذاكرة
+                await self._load_permissions()
+                await self._load_work_names()
+                await self._load_leaderboards()
 
-                # بدء معالج السجلات
+                # بدء خط الكتابة ثم معالج السجلات
+                self.write_worker_task = asyncio.create_task(self._write_worker())
                 self.log_worker_task = asyncio.create_task(self._log_worker())
+                self._read_reaper_task = asyncio.create_task(self._read_pool_reaper())
+                self._log_archiver_task = asyncio.create_task(self._log_archiver())
 
                 self.initialized = True
                 logger.info("✅ Database ready – final production version")
@@ -63,8 +197,99 @@ class Database:
                 await self._cleanup()
                 raise
 
-    async def _create_tables(self):
-        """إنشاء الجداول والفهارس (تُستدعى مرة واحدة)."""
+    # -----------------------------------------------------------
+    # الترحيلات (schema_version في settings)
+    # -----------------------------------------------------------
+    def _migrations(self):
+        """قائمة الترحيلات بالترتيب. لا تُعدّل ترحيلاً منشوراً – أضف ترحيلاً جديداً."""
+        return [
+            (1, self._migration_base_schema),
+            (2, self._migration_user_stats),
+            (3, self._migration_works_name_normalized),
+            (4, self._migration_works_fts),
+            (5, self._migration_chapters_daily),
+            (6, self._migration_hot_path_indexes),
+            (7, self._migration_integer_snowflakes),
+            (8, self._migration_epoch_timestamps),
+            (9, self._migration_tasks_keyset_index),
+            (10, self._migration_tasks_created_index),
+            (11, self._migration_pay_periods),
+        ]
+
+    async def _migrate(self):
+        """تشغيل الترحيلات المعلقة فقط، كل ترحيل في معاملة خاصة به."""
+        # settings نفسه مطلوب لقراءة الإصدار
+        await self.write_conn.execute('''
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        ''')
+        await self.write_conn.commit()
+
+        cursor = await self.write_conn.execute(
+            "SELECT value FROM settings WHERE key = 'schema_version'"
+        )
+        row = await cursor.fetchone()
+        await cursor.close()
+        current = int(row["value"]) if row else 0
+
+        pending = [(v, m) for v, m in self._migrations() if v > current]
+        if pending:
+            # إعادة بناء الجداول تتطلب تعطيل المفاتيح الأجنبية (لا يمكن تغييرها داخل معاملة)
+            await self.write_conn.execute("PRAGMA foreign_keys = OFF")
+            try:
+                for version, migration in pending:
+                    await self._run_migration(version, migration)
+            finally:
+                await self.write_conn.execute("PRAGMA foreign_keys = ON")
+        await self._detect_fts()
+
+    async def _run_migration(self, version: int, migration):
+        logger.info(f"🔧 Migration {version}: {migration.__name__}")
+        await self.write_conn.execute("BEGIN IMMEDIATE")
+        try:
+            await migration()
+            cursor = await self.write_conn.execute("PRAGMA foreign_key_check")
+            violations = await cursor.fetchall()
+            await cursor.close()
+            if violations:
+                raise RuntimeError(f"Migration {version} broke foreign keys: {len(violations)} rows")
+            await self.write_conn.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES ('schema_version', ?)",
+                (str(version),)
+            )
+            await self.write_conn.commit()
+        except Exception:
+            await self.write_conn.rollback()
+            raise
+
+    async def _has_works_fts(self) -> bool:
+        cursor = await self.write_conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'works_fts'"
+        )
+        exists = await cursor.fetchone() is not None
+        await cursor.close()
+        return exists
+
+    async def _detect_fts(self):
+        """تفعيل البحث بـ FTS، وإنشاء works_fts إذا لم يكن موجوداً (مثلاً بعد ترقية SQLite).
+
+        الترحيل 4 يُسجل كمنتهٍ حتى لو لم يدعم SQLite مقطّع trigram، لذا نعيد المحاولة هنا مع كل تشغيل.
+        """
+        if not await self._has_works_fts():
+            await self.write_conn.execute("BEGIN IMMEDIATE")
+            try:
+                await self._create_works_fts()
+                await self.write_conn.commit()
+                logger.info("🔎 works_fts created")
+            except Exception as e:
+                await self.write_conn.rollback()
+                logger.warning(f"⚠️ FTS5 trigram unavailable, falling back to prefix search: {e}")
+        self.fts_enabled = await self._has_works_fts()
+
+    async def _migration_base_schema(self):
+        """الجداول والفهارس الأساسية (IF NOT EXISTS لقواعد البيانات السابقة للترحيلات)."""
         await self.write_conn.execute('''
             CREATE TABLE IF NOT EXISTS users (
                 user_id TEXT PRIMARY KEY,
@@ -143,12 +368,6 @@ class Database:
                 added_at TEXT NOT NULL
             )
         ''')
-        await self.write_conn.execute('''
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL
-            )
-        ''')
 
         # فهارس إضافية
         await self.write_conn.execute('''
@@ -173,7 +392,534 @@ class Database:
         await self.write_conn.execute('''
             CREATE INDEX IF NOT EXISTS idx_logs_type ON logs(type)
         ''')
-        await self.write_conn.commit()
+
+    async def _migration_user_stats(self):
+        """ملخص لكل عضو يُحدّث داخل نفس معاملة الكتابة (قراءة واحدة بدلاً من تجميع)."""
+        await self.write_conn.execute('''
+            CREATE TABLE IF NOT EXISTS user_stats (
+                user_id TEXT PRIMARY KEY,
+                total_earned INTEGER NOT NULL DEFAULT 0,
+                chapters_count INTEGER NOT NULL DEFAULT 0,
+                pending_tasks INTEGER NOT NULL DEFAULT 0,
+                submitted_tasks INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE RESTRICT
+            )
+        ''')
+        await self.write_conn.execute('''
+            INSERT OR REPLACE INTO user_stats
+                (user_id, total_earned, chapters_count, pending_tasks, submitted_tasks)
+            SELECT u.user_id,
+                   (SELECT COALESCE(SUM(price), 0) FROM chapters c WHERE c.user_id = u.user_id),
+                   (SELECT COUNT(*) FROM chapters c WHERE c.user_id = u.user_id),
+                   (SELECT COUNT(*) FROM tasks t WHERE t.user_id = u.user_id AND t.status = 'pending'),
+                   (SELECT COUNT(*) FROM tasks t WHERE t.user_id = u.user_id AND t.status = 'submitted')
+            FROM users u
+        ''')
+        await self.write_conn.execute(
+            "DELETE FROM settings WHERE key = 'user_stats_built'"
+        )
+
+    async def _migration_works_name_normalized(self):
+        """عمود name_normalized المفهرس في works وتعبئته للصفوف الموجودة."""
+        cursor = await self.write_conn.execute("PRAGMA table_info(works)")
+        columns = {row["name"] for row in await cursor.fetchall()}
+        await cursor.close()
+        if "name_normalized" not in columns:
+            await self.write_conn.execute("ALTER TABLE works ADD COLUMN name_normalized TEXT")
+
+        cursor = await self.write_conn.execute("SELECT id, name FROM works")
+        rows = await cursor.fetchall()
+        await cursor.close()
+        await self.write_conn.executemany(
+            "UPDATE works SET name_normalized = ? WHERE id = ?",
+            [(normalize_name(row["name"]), row["id"]) for row in rows]
+        )
+        await self.write_conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_works_name_normalized ON works(name_normalized)
+        ''')
+
+    async def _migration_works_fts(self):
+        """جدول FTS5 بمقطّع trigram فوق works.name_normalized مع triggers للمزامنة."""
+        await self.write_conn.execute("SAVEPOINT works_fts")
+        try:
+            await self._create_works_fts()
+        except Exception:
+            # غير مدعوم في نسخة SQLite هذه – _detect_fts يعيد المحاولة عند كل تشغيل
+            await self.write_conn.execute("ROLLBACK TO works_fts")
+        await self.write_conn.execute("RELEASE works_fts")
+
+    async def _create_works_fts(self):
+        """إنشاء works_fts و triggers المزامنة وتعبئته (داخل معاملة المستدعي)."""
+        await self.write_conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS works_fts USING fts5(
+                name_normalized, content='works', content_rowid='id', tokenize='trigram'
+            )
+        ''')
+        await self.write_conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS works_fts_ai AFTER INSERT ON works BEGIN
+                INSERT INTO works_fts (rowid, name_normalized) VALUES (new.id, new.name_normalized);
+            END
+        ''')
+        await self.write_conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS works_fts_ad AFTER DELETE ON works BEGIN
+                INSERT INTO works_fts (works_fts, rowid, name_normalized)
+                VALUES ('delete', old.id, old.name_normalized);
+            END
+        ''')
+        await self.write_conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS works_fts_au AFTER UPDATE OF name_normalized ON works BEGIN
+                INSERT INTO works_fts (works_fts, rowid, name_normalized)
+                VALUES ('delete', old.id, old.name_normalized);
+                INSERT INTO works_fts (rowid, name_normalized) VALUES (new.id, new.name_normalized);
+            END
+        ''')
+        await self.write_conn.execute("INSERT INTO works_fts (works_fts) VALUES ('rebuild')")
+
+    async def _migration_chapters_daily(self):
+        """تجميع يومي لكل عضو يُحدّث بـ trigger عند إدخال الفصول (نفس المعاملة)."""
+        await self.write_conn.execute('''
+            CREATE TABLE IF NOT EXISTS chapters_daily (
+                user_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                chapters INTEGER NOT NULL DEFAULT 0,
+                earnings INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, day)
+            ) WITHOUT ROWID
+        ''')
+        await self.write_conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_chapters_daily_day ON chapters_daily(day)
+        ''')
+        await self.write_conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS chapters_daily_ai AFTER INSERT ON chapters BEGIN
+                INSERT INTO chapters_daily (user_id, day, chapters, earnings)
+                VALUES (new.user_id, substr(new.created_at, 1, 10), 1, new.price)
+                ON CONFLICT(user_id, day) DO UPDATE SET
+                    chapters = chapters + 1,
+                    earnings = earnings + excluded.earnings;
+            END
+        ''')
+        await self.write_conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS chapters_daily_ad AFTER DELETE ON chapters BEGIN
+                UPDATE chapters_daily
+                SET chapters = chapters - 1, earnings = earnings - old.price
+                WHERE user_id = old.user_id AND day = substr(old.created_at, 1, 10);
+            END
+        ''')
+        await self.write_conn.execute("DELETE FROM chapters_daily")
+        await self.write_conn.execute('''
+            INSERT INTO chapters_daily (user_id, day, chapters, earnings)
+            SELECT user_id, substr(created_at, 1, 10), COUNT(*), COALESCE(SUM(price), 0)
+            FROM chapters GROUP BY user_id, substr(created_at, 1, 10)
+        ''')
+        await self.write_conn.execute(
+            "DELETE FROM settings WHERE key = 'chapters_daily_built'"
+        )
+
+    async def _migration_hot_path_indexes(self):
+        """فهارس المسارات الساخنة + فهارس جزئية للأعمال النشطة فقط."""
+        # get_user_tasks: WHERE user_id = ? ORDER BY created_at DESC
+        await self.write_conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_tasks_user_created ON tasks(user_id, created_at DESC)
+        ''')
+        # عدّ المهام حسب الحالة في تقرير الفريق
+        await self.write_conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)
+        ''')
+        # نطاقات التاريخ على الفصول (التقارير والتصدير)
+        await self.write_conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_chapters_created ON chapters(created_at)
+        ''')
+        # كل استعلامات الأعمال بالاسم تشترط is_active = 1
+        await self.write_conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_works_active_normalized
+            ON works(name_normalized) WHERE is_active = 1
+        ''')
+        await self.write_conn.execute("DROP INDEX IF EXISTS idx_works_name_normalized")
+        await self.write_conn.execute("DROP INDEX IF EXISTS idx_works_name")
+
+    async def _migration_integer_snowflakes(self):
+        """تخزين معرفات ديسكورد (snowflakes) كـ INTEGER بدلاً من TEXT.
+
+        السجلات تبقى كما هي (نص حر ومؤرشفة بملفات منفصلة).
+        """
+        tables = {
+            "users": '''
+                CREATE TABLE users_new (
+                    user_id INTEGER PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    display_name TEXT,
+                    joined_at TEXT NOT NULL,
+                    is_banned INTEGER DEFAULT 0
+                )''',
+            "works": '''
+                CREATE TABLE works_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL,
+                    link TEXT NOT NULL,
+                    added_by INTEGER NOT NULL,
+                    created_at TEXT NOT NULL,
+                    is_active INTEGER DEFAULT 1,
+                    name_normalized TEXT
+                )''',
+            "tasks": '''
+                CREATE TABLE tasks_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    username TEXT NOT NULL,
+                    display_name TEXT,
+                    work_id INTEGER NOT NULL,
+                    chapter INTEGER NOT NULL,
+                    price INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    assigned_by INTEGER NOT NULL,
+                    created_at TEXT NOT NULL,
+                    submitted_at TEXT,
+                    approved_at TEXT,
+                    rejected_at TEXT,
+                    approved_by INTEGER,
+                    rejected_by INTEGER,
+                    reject_reason TEXT,
+                    FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE RESTRICT,
+                    FOREIGN KEY (work_id) REFERENCES works (id) ON DELETE RESTRICT
+                )''',
+            "chapters": '''
+                CREATE TABLE chapters_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    username TEXT NOT NULL,
+                    display_name TEXT,
+                    work_id INTEGER NOT NULL,
+                    chapter INTEGER NOT NULL,
+                    price INTEGER NOT NULL,
+                    approved_by INTEGER NOT NULL,
+                    created_at TEXT NOT NULL,
+                    FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE RESTRICT,
+                    FOREIGN KEY (work_id) REFERENCES works (id) ON DELETE RESTRICT,
+                    UNIQUE(user_id, work_id, chapter)
+                )''',
+            "admins": '''
+                CREATE TABLE admins_new (
+                    user_id INTEGER PRIMARY KEY,
+                    added_by INTEGER NOT NULL,
+                    added_at TEXT NOT NULL
+                )''',
+            "user_stats": '''
+                CREATE TABLE user_stats_new (
+                    user_id INTEGER PRIMARY KEY,
+                    total_earned INTEGER NOT NULL DEFAULT 0,
+                    chapters_count INTEGER NOT NULL DEFAULT 0,
+                    pending_tasks INTEGER NOT NULL DEFAULT 0,
+                    submitted_tasks INTEGER NOT NULL DEFAULT 0,
+                    FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE RESTRICT
+                )''',
+            "chapters_daily": '''
+                CREATE TABLE chapters_daily_new (
+                    user_id INTEGER NOT NULL,
+                    day TEXT NOT NULL,
+                    chapters INTEGER NOT NULL DEFAULT 0,
+                    earnings INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (user_id, day)
+                ) WITHOUT ROWID''',
+        }
+        to_integer = "CAST({col} AS INTEGER)"
+        await self._rebuild_tables(tables, {
+            col: to_integer for col in
+            ("user_id", "added_by", "assigned_by", "approved_by", "rejected_by")
+        })
+
+    async def _migration_epoch_timestamps(self):
+        """أعمدة الوقت كـ INTEGER (ثوانٍ منذ epoch بتوقيت UTC) بدلاً من نص ISO.
+
+        النوع المعلن EPOCH (تقارب NUMERIC) يسمح بتحويله إلى datetime عند القراءة.
+        السجلات تبقى نصاً لأن ملفات الأرشيف الشهرية تشاركها نفس المخطط.
+        """
+        tables = {
+            "users": '''
+                CREATE TABLE users_new (
+                    user_id INTEGER PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    display_name TEXT,
+                    joined_at EPOCH NOT NULL,
+                    is_banned INTEGER DEFAULT 0
+                )''',
+            "works": '''
+                CREATE TABLE works_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL,
+                    link TEXT NOT NULL,
+                    added_by INTEGER NOT NULL,
+                    created_at EPOCH NOT NULL,
+                    is_active INTEGER DEFAULT 1,
+                    name_normalized TEXT
+                )''',
+            "tasks": '''
+                CREATE TABLE tasks_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    username TEXT NOT NULL,
+                    display_name TEXT,
+                    work_id INTEGER NOT NULL,
+                    chapter INTEGER NOT NULL,
+                    price INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    assigned_by INTEGER NOT NULL,
+                    created_at EPOCH NOT NULL,
+                    submitted_at EPOCH,
+                    approved_at EPOCH,
+                    rejected_at EPOCH,
+                    approved_by INTEGER,
+                    rejected_by INTEGER,
+                    reject_reason TEXT,
+                    FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE RESTRICT,
+                    FOREIGN KEY (work_id) REFERENCES works (id) ON DELETE RESTRICT
+                )''',
+            "chapters": '''
+                CREATE TABLE chapters_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    username TEXT NOT NULL,
+                    display_name TEXT,
+                    work_id INTEGER NOT NULL,
+                    chapter INTEGER NOT NULL,
+                    price INTEGER NOT NULL,
+                    approved_by INTEGER NOT NULL,
+                    created_at EPOCH NOT NULL,
+                    FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE RESTRICT,
+                    FOREIGN KEY (work_id) REFERENCES works (id) ON DELETE RESTRICT,
+                    UNIQUE(user_id, work_id, chapter)
+                )''',
+            "admins": '''
+                CREATE TABLE admins_new (
+                    user_id INTEGER PRIMARY KEY,
+                    added_by INTEGER NOT NULL,
+                    added_at EPOCH NOT NULL
+                )''',
+        }
+        to_epoch = "CAST(strftime('%s', {col}) AS INTEGER)"
+        await self._rebuild_tables(tables, {
+            col: to_epoch for col in
+            ("joined_at", "created_at", "submitted_at", "approved_at", "rejected_at", "added_at")
+        })
+
+        # تجميع اليوم من epoch بدلاً من أول 10 أحرف من النص
+        await self.write_conn.execute("DROP TRIGGER IF EXISTS chapters_daily_ai")
+        await self.write_conn.execute("DROP TRIGGER IF EXISTS chapters_daily_ad")
+        await self.write_conn.execute('''
+            CREATE TRIGGER chapters_daily_ai AFTER INSERT ON chapters BEGIN
+                INSERT INTO chapters_daily (user_id, day, chapters, earnings)
+                VALUES (new.user_id, date(new.created_at, 'unixepoch'), 1, new.price)
+                ON CONFLICT(user_id, day) DO UPDATE SET
+                    chapters = chapters + 1,
+                    earnings = earnings + excluded.earnings;
+            END
+        ''')
+        await self.write_conn.execute('''
+            CREATE TRIGGER chapters_daily_ad AFTER DELETE ON chapters BEGIN
+                UPDATE chapters_daily
+                SET chapters = chapters - 1, earnings = earnings - old.price
+                WHERE user_id = old.user_id AND day = date(old.created_at, 'unixepoch');
+            END
+        ''')
+
+    async def _migration_tasks_keyset_index(self):
+        """فهرس صفحات مهام العضو: (user_id, status, created_at, id) يغطي العد والترتيب معاً."""
+        await self.write_conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_tasks_user_status_created
+            ON tasks(user_id, status, created_at DESC, id DESC)
+        ''')
+        # بادئة للفهرس الجديد
+        await self.write_conn.execute("DROP INDEX IF EXISTS idx_tasks_user_status")
+
+    async def _migration_tasks_created_index(self):
+        """نطاقات التاريخ على المهام (التصدير حسب الفترة)."""
+        await self.write_conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks(created_at)
+        ''')
+
+    async def _migration_pay_periods(self):
+        """فترات الرواتب: حد لكل فترة مغلقة + لقطة (فصول، مبلغ) لكل عضو فيها.
+
+        الحد هو آخر chapters.id داخل الفترة (وليس الوقت) حتى لا تضيع فصول الثانية نفسها.
+        """
+        await self.write_conn.execute('''
+            CREATE TABLE IF NOT EXISTS pay_periods (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                last_chapter_id INTEGER NOT NULL,
+                start_at EPOCH NOT NULL,
+                end_at EPOCH NOT NULL,
+                closed_by INTEGER NOT NULL,
+                closed_at EPOCH NOT NULL
+            )
+        ''')
+        await self.write_conn.execute('''
+            CREATE TABLE IF NOT EXISTS pay_period_snapshots (
+                period_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                chapters INTEGER NOT NULL,
+                amount INTEGER NOT NULL,
+                PRIMARY KEY (period_id, user_id),
+                FOREIGN KEY (period_id) REFERENCES pay_periods (id) ON DELETE RESTRICT,
+                FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE RESTRICT
+            ) WITHOUT ROWID
+        ''')
+        # مجموع اللقطات لكل عضو – الفترة المفتوحة = الإجمالي - المدفوع
+        cursor = await self.write_conn.execute("PRAGMA table_info(user_stats)")
+        columns = {row["name"] for row in await cursor.fetchall()}
+        await cursor.close()
+        for column in ("paid_amount", "paid_chapters"):
+            if column not in columns:
+                await self.write_conn.execute(
+                    f"ALTER TABLE user_stats ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"
+                )
+
+    async def _rebuild_tables(self, tables: dict[str, str], column_exprs: dict[str, str]):
+        """إعادة بناء جداول بتعريف جديد ونسخ الصفوف (column_exprs: عمود -> تعبير تحويل).
+
+        SQLite لا يغيّر نوع عمود بـ ALTER. كل CREATE في tables ينشئ <اسم>_new، ثم يُنسخ
+        ويُحذف القديم ويُعاد تسميته، وتُعاد الفهارس والـ triggers كما كانت.
+        """
+        # الفهارس والـ triggers تُحذف مع الجدول القديم – نحفظ تعريفها لإعادتها
+        placeholders = ", ".join("?" * len(tables))
+        cursor = await self.write_conn.execute(
+            f'''SELECT type, name, sql FROM sqlite_master
+                WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+                AND tbl_name IN ({placeholders})''',
+            tuple(tables)
+        )
+        schema_objects = await cursor.fetchall()
+        await cursor.close()
+        for obj in schema_objects:
+            if obj["type"] == "trigger":
+                await self.write_conn.execute(f"DROP TRIGGER {obj['name']}")
+
+        for table, create_sql in tables.items():
+            cursor = await self.write_conn.execute(f"PRAGMA table_info({table})")
+            columns = [row["name"] for row in await cursor.fetchall()]
+            await cursor.close()
+            select = ", ".join(
+                column_exprs[col].format(col=col) if col in column_exprs else col for col in columns
+            )
+            await self.write_conn.execute(create_sql)
+            await self.write_conn.execute(
+                f"INSERT INTO {table}_new ({', '.join(columns)}) SELECT {select} FROM {table}"
+            )
+            await self.write_conn.execute(f"DROP TABLE {table}")
+            await self.write_conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+        for obj in schema_objects:
+            await self.write_conn.execute(obj["sql"])
+
+    async def _load_permissions(self):
+        """تحميل قائمة الأدمن والأونر إلى الذاكرة (مرة واحدة عند التهيئة)."""
+        cursor = await self.write_conn.execute("SELECT user_id FROM admins")
+        rows = await cursor.fetchall()
+        await cursor.close()
+        self.admin_ids = {row["user_id"] for row in rows}
+
+        cursor = await self.write_conn.execute("SELECT value FROM settings WHERE key = 'owner_id'")
+        row = await cursor.fetchone()
+        await cursor.close()
+        self.owner_id = int(row["value"]) if row else None
+
+    async def _load_work_names(self):
+        """تحميل أسماء الأعمال النشطة إلى الذاكرة (مرة واحدة عند التهيئة)."""
+        cursor = await self.write_conn.execute(
+            "SELECT id, name FROM works WHERE is_active = 1 ORDER BY id"
+        )
+        rows = await cursor.fetchall()
+        await cursor.close()
+        self.work_ids = {}
+        self.work_names = {}
+        for row in rows:
+            key = self._work_key(row["name"])
+            if key not in self.work_ids:
+                self.work_ids[key] = row["id"]
+                self.work_names[key] = row["name"]
+        self.work_keys = sorted(self.work_ids)
+
+    def _cache_work(self, name: str, work_id: int):
+        key = self._work_key(name)
+        if key in self.work_ids:
+            return
+        self.work_ids[key] = work_id
+        self.work_names[key] = name
+        bisect.insort(self.work_keys, key)
+
+    def _uncache_work(self, name: str):
+        key = self._work_key(name)
+        if self.work_ids.pop(key, None) is None:
+            return
+        self.work_names.pop(key, None)
+        i = bisect.bisect_left(self.work_keys, key)
+        if i < len(self.work_keys) and self.work_keys[i] == key:
+            del self.work_keys[i]
+
+    @staticmethod
+    def _work_key(name: str) -> str:
+        return normalize_name(name)
+
+    def resolve_work_id(self, name: str) -> int | None:
+        """تحويل اسم العمل إلى work_id من الذاكرة (بدون استعلام)."""
+        return self.work_ids.get(self._work_key(name))
+
+    def autocomplete_works(self, prefix: str, limit: int = 25) -> list[str]:
+        """أسماء الأعمال النشطة التي تبدأ بـ prefix (من الذاكرة فقط، بدون SQLite)."""
+        key = self._work_key(prefix)
+        start = bisect.bisect_left(self.work_keys, key)
+        names = []
+        for candidate in self.work_keys[start:start + limit]:
+            if not candidate.startswith(key):
+                break
+            names.append(self.work_names[candidate])
+        return names
+
+    async def _load_leaderboards(self):
+        """بناء لوحات المتصدرين مرة واحدة عند التهيئة."""
+        cursor = await self.write_conn.execute("SELECT user_id, username, display_name FROM users")
+        self.user_names = {
+            row["user_id"]: (row["username"], row["display_name"]) for row in await cursor.fetchall()
+        }
+        await cursor.close()
+
+        self.leaderboard = Leaderboard()
+        self.work_leaderboards = {}
+        cursor = await self.write_conn.execute('''
+            SELECT user_id, work_id, COUNT(*) as count, COALESCE(SUM(price), 0) as total
+            FROM chapters GROUP BY user_id, work_id
+        ''')
+        for row in await cursor.fetchall():
+            self.leaderboard.add(row["user_id"], row["count"], row["total"])
+            self.work_leaderboards.setdefault(row["work_id"], Leaderboard()).add(
+                row["user_id"], row["count"], row["total"]
+            )
+        await cursor.close()
+
+        self._daily_scores = {}
+        since = (datetime.utcnow().date() - timedelta(days=7)).isoformat()
+        cursor = await self.write_conn.execute(
+            "SELECT user_id, day, chapters, earnings FROM chapters_daily WHERE day >= ?", (since,)
+        )
+        for row in await cursor.fetchall():
+            self._daily_scores.setdefault(row["day"], {})[row["user_id"]] = [row["chapters"], row["earnings"]]
+        await cursor.close()
+
+    def _record_approved(self, tasks: list[dict]):
+        """تحديث لوحات المتصدرين بعد commit اعتماد فصل أو أكثر."""
+        today = datetime.utcnow().date()
+        day = today.isoformat()
+        bucket = self._daily_scores.setdefault(day, {})
+        for task in tasks:
+            user_id = task["user_id"]
+            self.leaderboard.add(user_id, 1, task["price"])
+            self.work_leaderboards.setdefault(task["work_id"], Leaderboard()).add(user_id, 1, task["price"])
+            score = bucket.setdefault(user_id, [0, 0])
+            score[0] += 1
+            score[1] += task["price"]
+            self.user_names[user_id] = (task["username"], task["display_name"])
+
+        oldest = (today - timedelta(days=7)).isoformat()
+        for old_day in [d for d in self._daily_scores if d < oldest]:
+            del self._daily_scores[old_day]
 
     async def close(self):
         """إغلاق جميع الاتصالات وانتظار السجلات المتبقية بأمان."""
@@ -189,6 +935,19 @@ class Database:
             except asyncio.CancelledError:
                 pass
 
+        for task in (self._read_reaper_task, self._log_archiver_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+        # إيقاف خط الكتابة بعد تنفيذ كل ما في الطابور
+        if self.write_worker_task and not self.write_worker_task.done():
+            await self.write_queue.put(None)
+            await self.write_worker_task
+
         # إغلاق اتصال الكتابة
         if self.write_conn:
             await self.write_conn.close()
@@ -217,36 +976,286 @@ class Database:
     # -----------------------------------------------------------
     # إدارة اتصالات القراءة (Pool حقيقي)
     # -----------------------------------------------------------
+    async def _open_read_conn(self):
+        conn = await aiosqlite.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+        self._read_conns.append(conn)
+        await conn.execute("PRAGMA busy_timeout = 5000;")
+        await conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.row_factory = aiosqlite.Row
+        self.read_pool_stats["opened"] += 1
+        return conn
+
     async def _get_read_conn(self):
-        return await self.read_queue.get()
+        self.read_pool_stats["checkouts"] += 1
+        try:
+            return self.read_queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+
+        # لا يوجد اتصال متاح: ننتظر قليلاً، ثم نكبر الـ pool إذا سمح الحد الأقصى
+        self.read_pool_stats["waits"] += 1
+        getter = asyncio.ensure_future(self.read_queue.get())
+        try:
+            done, _ = await asyncio.wait({getter}, timeout=self.read_pool_grow_wait)
+        except asyncio.CancelledError:
+            self._abandon_read_getter(getter)
+            raise
+        if done:
+            return getter.result()
+
+        if len(self._read_conns) + self._read_opening < self.read_pool_max:
+            self._abandon_read_getter(getter)
+            self._read_opening += 1
+            try:
+                conn = await self._open_read_conn()
+            finally:
+                self._read_opening -= 1
+            logger.info(f"📈 Read pool grew to {len(self._read_conns)}")
+            return conn
+
+        try:
+            return await getter
+        except asyncio.CancelledError:
+            self._abandon_read_getter(getter)
+            raise
+
+    def _abandon_read_getter(self, getter):
+        """إلغاء انتظار الطابور؛ إذا كان قد استلم اتصالاً نعيده للـ pool."""
+        if not getter.cancel() and not getter.cancelled():
+            self.read_queue.put_nowait(getter.result())
+
+    def _release_read_conn_nowait(self, conn):
+        self._read_idle_since[conn] = asyncio.get_running_loop().time()
+        self.read_queue.put_nowait(conn)
 
     async def _release_read_conn(self, conn):
-        await self.read_queue.put(conn)
+        self._release_read_conn_nowait(conn)
 
-    async def _fetchone(self, sql: str, params: tuple = ()):
+    async def _read_pool_reaper(self):
+        """إغلاق الاتصالات الخاملة الزائدة عن الحد الأدنى بشكل دوري."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.read_pool_reap_interval)
+            now = loop.time()
+            idle = []
+            while True:
+                try:
+                    idle.append(self.read_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            to_close = []
+            for conn in idle:
+                if (len(self._read_conns) - len(to_close) > self.read_pool_min
+                        and now - self._read_idle_since.get(conn, now) >= self.read_pool_idle_timeout):
+                    to_close.append(conn)
+                else:
+                    self.read_queue.put_nowait(conn)
+
+            for conn in to_close:
+                self._read_conns.remove(conn)
+                self._read_idle_since.pop(conn, None)
+                self.read_pool_stats["closed"] += 1
+                try:
+                    await conn.close()
+                except Exception as e:
+                    logger.error(f"Error closing idle read connection: {e}")
+            if to_close:
+                logger.info(f"📉 Read pool shrank to {len(self._read_conns)}")
+
+    def read_pool_status(self) -> dict:
+        return {
+            "size": len(self._read_conns),
+            "idle": self.read_queue.qsize(),
+            "min": self.read_pool_min,
+            "max": self.read_pool_max,
+            **self.read_pool_stats
+        }
+
+    # -----------------------------------------------------------
+    # قياس الأداء
+    # -----------------------------------------------------------
+    def _record(self, name: str, seconds: float, rows: int = 0):
+        stats = self.query_stats.get(name)
+        if stats is None:
+            stats = self.query_stats[name] = LatencyStats()
+        stats.add(seconds, rows)
+
+    def query_stats_summary(self) -> list[dict]:
+        """ملخص زمن كل استعلام مرتباً من الأبطأ (p95) إلى الأسرع."""
+        summary = [{"name": name, **stats.summary()} for name, stats in self.query_stats.items()]
+        summary.sort(key=lambda s: s["p95_ms"], reverse=True)
+        return summary
+
+    async def _fetchone(self, sql: str, params: tuple = (), name: str = None):
         if not self.initialized:
             await self.initialize()
+        name = name or sys._getframe(1).f_code.co_name
+        started = time.perf_counter()
         conn = await self._get_read_conn()
+        acquired = time.perf_counter()
+        self._record("pool:read_wait", acquired - started)
         try:
             cursor = await conn.execute(sql, params)
             row = await cursor.fetchone()
             await cursor.close()
+            self._record(name, time.perf_counter() - acquired, 1 if row else 0)
             return row
         finally:
             await self._release_read_conn(conn)
 
-    async def _fetchall(self, sql: str, params: tuple = ()):
+    async def _fetchall(self, sql: str, params: tuple = (), name: str = None):
         if not self.initialized:
             await self.initialize()
+        name = name or sys._getframe(1).f_code.co_name
+        started = time.perf_counter()
         conn = await self._get_read_conn()
+        acquired = time.perf_counter()
+        self._record("pool:read_wait", acquired - started)
         try:
             cursor = await conn.execute(sql, params)
             rows = await cursor.fetchall()
             await cursor.close()
+            self._record(name, time.perf_counter() - acquired, len(rows))
             return rows
         finally:
             await self._release_read_conn(conn)
 
+    async def _iterate(self, sql: str, params: tuple, name: str, batch_size: int = 1000):
+        """بث الصفوف على دفعات من اتصال قراءة واحد (الذاكرة ثابتة مهما كان عدد الصفوف).
+
+        الاتصال محجوز حتى ينتهي المستهلك أو يغلق المولّد.
+        """
+        if not self.initialized:
+            await self.initialize()
+        started = time.perf_counter()
+        conn = await self._get_read_conn()
+        acquired = time.perf_counter()
+        self._record("pool:read_wait", acquired - started)
+        count = 0
+        try:
+            cursor = await conn.execute(sql, params)
+            try:
+                while rows := await cursor.fetchmany(batch_size):
+                    count += len(rows)
+                    for row in rows:
+                        yield row
+            finally:
+                await cursor.close()
+            self._record(name, time.perf_counter() - acquired, count)
+        finally:
+            await self._release_read_conn(conn)
+
+    # -----------------------------------------------------------
+    # خط الكتابة (Group commit بدلاً من write_lock)
+    # -----------------------------------------------------------
+    async def _write(self, op):
+        """إرسال عملية كتابة إلى الخط وانتظار نتيجتها.
+
+        op دالة async بدون معاملات تنفذ أوامرها على write_conn بدون commit.
+        تُجمع العمليات المتزامنة في معاملة واحدة، ولكل عملية نقطة حفظ خاصة بها،
+        فإذا فشلت عملية يُتراجع عنها وحدها وتُعاد استثناؤها للمستدعي.
+        """
+        if not self.initialized:
+            await self.initialize()
+        future = asyncio.get_running_loop().create_future()
+        await self.write_queue.put((op, future, time.perf_counter()))
+        return await future
+
+    @staticmethod
+    def _op_name(op) -> str:
+        # "Database.approve_task.<locals>.op" -> "write:approve_task"
+        parts = op.__qualname__.split(".")
+        if "<locals>" in parts:
+            return "write:" + parts[parts.index("<locals>") - 1]
+        return "write:" + parts[-1]
+
+    async def _write_worker(self):
+        """معالج خلفي يجمع عمليات الكتابة وينفذها في معاملة واحدة."""
+        stop = False
+        while not stop:
+            item = await self.write_queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.write_batch_size:
+                try:
+                    item = self.write_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                await self._run_write_batch(batch)
+            except Exception as e:
+                logger.error(f"Write worker error: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _run_write_batch(self, batch):
+        """تنفيذ دفعة عمليات في BEGIN IMMEDIATE واحدة مع نقطة حفظ لكل عملية."""
+        begin = time.perf_counter()
+        results = []
+        try:
+            await self.write_conn.execute("BEGIN IMMEDIATE")
+            for i, (op, future, enqueued) in enumerate(batch):
+                # المستدعي ألغي (مثلاً انتهت مهلة التفاعل) – لا ننفذ كتابته كما كان مع write_lock
+                if future.cancelled():
+                    continue
+                savepoint = f"op_{i}"
+                started = time.perf_counter()
+                self._record("pool:write_wait", started - enqueued)
+                changes = self.write_conn.total_changes
+                await self.write_conn.execute(f"SAVEPOINT {savepoint}")
+                try:
+                    result = await op()
+                    self._record(self._op_name(op), time.perf_counter() - started,
+                                 self.write_conn.total_changes - changes)
+                    await self.write_conn.execute(f"RELEASE {savepoint}")
+                    results.append((future, result, None))
+                except Exception as e:
+                    await self.write_conn.execute(f"ROLLBACK TO {savepoint}")
+                    await self.write_conn.execute(f"RELEASE {savepoint}")
+                    if isinstance(e, _Rollback):
+                        results.append((future, e.result, None))
+                    else:
+                        results.append((future, None, e))
+
+            commit_started = time.perf_counter()
+            await self.write_conn.commit()
+            finished = time.perf_counter()
+            self._record("write:commit", finished - commit_started)
+            self._record("write:lock_hold", finished - begin, len(batch))
+        except Exception as e:
+            # أي فشل (BEGIN، نقطة حفظ، ROLLBACK TO بعد تراجع SQLite التلقائي، أو commit):
+            # نغلق المعاملة حتى لا تفشل كل الدفعات التالية، والكاش قد حُدّث داخل العمليات
+            logger.error(f"Write batch failed: {e}")
+            try:
+                if self.write_conn.in_transaction:
+                    await self.write_conn.rollback()
+            except Exception as rollback_error:
+                logger.error(f"Write batch rollback failed: {rollback_error}")
+            try:
+                await self._load_permissions()
+                await self._load_work_names()
+            except Exception as reload_error:
+                logger.error(f"Error reloading caches after failed write batch: {reload_error}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result, error in results:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
     # -----------------------------------------------------------
     # نظام السجلات (Batching + إغلاق آمن)
     # -----------------------------------------------------------
@@ -285,91 +1294,143 @@ class Database:
                 self.log_queue.task_done()
 
     async def _flush_log_batch(self, batch):
-        """كتابة دفعة سجلات مع write_lock."""
-        async with self.write_lock:
-            try:
-                await self.write_conn.executemany(
-                    '''INSERT INTO logs (action, user_id, target_id, details, timestamp, type)
-                       VALUES (?, ?, ?, ?, ?, ?)''',
-                    [
-                        (action, user_id, target_id,
-                         json.dumps(details or {}, ensure_ascii=False),
-                         self._now(), log_type)
-                        for (action, user_id, target_id, details, log_type) in batch
-                    ]
-                )
-                await self.write_conn.commit()
-            except Exception as e:
-                logger.error(f"Failed to flush log batch: {e}")
-                # في حالة الفشل، نفضل فقدان السجلات بدلاً من تعطيل النظام
+        """كتابة دفعة سجلات عبر خط الكتابة."""
+        rows = [
+            (action, user_id, target_id,
+             json.dumps(details or {}, ensure_ascii=False),
+             self._log_timestamp(), log_type)
+            for (action, user_id, target_id, details, log_type) in batch
+        ]
+
+        async def op():
+            await self.write_conn.executemany(
+                '''INSERT INTO logs (action, user_id, target_id, details, timestamp, type)
+                   VALUES (?, ?, ?, ?, ?, ?)''',
+                rows
+            )
 
-    async def _enqueue_log(self, action: str, user_id: str, target_id: str = None,
+        try:
+            await self._write(op)
+        except Exception as e:
+            logger.error(f"Failed to flush log batch: {e}")
+            # في حالة الفشل، نفضل فقدان السجلات بدلاً من تعطيل النظام
+
+    async def _enqueue_log(self, action: str, user_id: int, target_id: int = None,
                            details: dict = None, log_type: str = "normal"):
-        """إضافة سجل إلى قائمة الانتظار (المالية لا تُفقد)."""
+        """إضافة سجل إلى قائمة الانتظار بدون انتظار أبداً.
+
+        السجلات المالية لا تمر من هنا: تُكتب عبر _insert_log داخل نفس معاملة الفصل.
+        """
         if not self.initialized:
             await self.initialize()
         try:
-            if log_type == "financial":
-                await self.log_queue.put((action, user_id, target_id, details, log_type))
-            else:
-                self.log_queue.put_nowait((action, user_id, target_id, details, log_type))
+            self.log_queue.put_nowait((action, user_id, target_id, details, log_type))
         except asyncio.QueueFull:
-            if log_type == "financial":
-                logger.critical("Financial log queue full! Data may be lost.")
+            logger.warning(f"Log queue full, dropping {log_type} log: {action}")
+
+    async def _insert_log(self, action: str, user_id: int, target_id: int = None,
+                          details: dict = None, log_type: str = "normal"):
+        """كتابة سجل مباشرة – تُستدعى من داخل عملية كتابة (نفس المعاملة)."""
+        await self.write_conn.execute(
+            '''INSERT INTO logs (action, user_id, target_id, details, timestamp, type)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            (action, user_id, target_id,
+             json.dumps(details or {}, ensure_ascii=False), self._log_timestamp(), log_type)
+        )
+
+    def _now(self) -> int:
+        """الوقت الحالي بالثواني منذ epoch (لأعمدة EPOCH)."""
+        return int(time.time())
 
-    def _now(self):
+    def _log_timestamp(self) -> str:
         return datetime.utcnow().isoformat()
 
+    async def _bump_user_stats(self, user_id: int, pending: int = 0, submitted: int = 0,
+                               chapters: int = 0, earned: int = 0):
+        """تحديث ملخص العضو – تُستدعى من داخل عملية كتابة (نفس المعاملة)."""
+        await self.write_conn.execute(
+            '''INSERT INTO user_stats
+                   (user_id, total_earned, chapters_count, pending_tasks, submitted_tasks)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(user_id) DO UPDATE SET
+                   total_earned = total_earned + excluded.total_earned,
+                   chapters_count = chapters_count + excluded.chapters_count,
+                   pending_tasks = pending_tasks + excluded.pending_tasks,
+                   submitted_tasks = submitted_tasks + excluded.submitted_tasks''',
+            (user_id, earned, chapters, pending, submitted)
+        )
+
     # -----------------------------------------------------------
-    # owner
+    # settings
     # -----------------------------------------------------------
-    async def get_owner_id(self) -> str | None:
-        row = await self._fetchone("SELECT value FROM settings WHERE key = 'owner_id'")
+    async def get_setting(self, key: str) -> str | None:
+        row = await self._fetchone("SELECT value FROM settings WHERE key = ?", (key,))
         return row["value"] if row else None
 
-    async def set_owner_id(self, owner_id: str):
+    async def set_setting(self, key: str, value: str):
+        async def op():
+            await self.write_conn.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value)
+            )
+
+        await self._write(op)
+
+    # -----------------------------------------------------------
+    # owner
+    # -----------------------------------------------------------
+    async def get_owner_id(self) -> int | None:
         if not self.initialized:
             await self.initialize()
-        async with self.write_lock:
+        return self.owner_id
+
+    async def set_owner_id(self, owner_id: int):
+        async def op():
             await self.write_conn.execute(
                 "INSERT OR REPLACE INTO settings (key, value) VALUES ('owner_id', ?)",
-                (owner_id,)
+                (str(owner_id),)
             )
-            await self.write_conn.commit()
+            self.owner_id = owner_id
+
+        await self._write(op)
 
     # -----------------------------------------------------------
     # admin
     # -----------------------------------------------------------
-    async def add_admin(self, user_id: str, added_by: str) -> bool:
-        if not self.initialized:
-            await self.initialize()
-        async with self.write_lock:
+    async def add_admin(self, user_id: int, added_by: int) -> bool:
+        async def op():
             cursor = await self.write_conn.execute(
                 "INSERT OR IGNORE INTO admins (user_id, added_by, added_at) VALUES (?, ?, ?)",
                 (user_id, added_by, self._now())
             )
-            await self.write_conn.commit()
-            success = cursor.rowcount > 0
+            self.admin_ids.add(user_id)
+            return cursor.rowcount > 0
+
+        success = await self._write(op)
         if success:
             await self._enqueue_log("add_admin", added_by, target_id=user_id)
         return success
 
-    async def remove_admin(self, user_id: str, removed_by: str) -> bool:
-        if not self.initialized:
-            await self.initialize()
-        async with self.write_lock:
+    async def remove_admin(self, user_id: int, removed_by: int) -> bool:
+        async def op():
             cursor = await self.write_conn.execute(
                 "DELETE FROM admins WHERE user_id = ?", (user_id,)
             )
-            await self.write_conn.commit()
-            success = cursor.rowcount > 0
+            self.admin_ids.discard(user_id)
+            return cursor.rowcount > 0
+
+        success = await self._write(op)
         if success:
             await self._enqueue_log("remove_admin", removed_by, target_id=user_id)
         return success
 
-    async def is_admin(self, user_id: str) -> bool:
-        row = await self._fetchone("SELECT 1 FROM admins WHERE user_id = ?", (user_id,))
-        return row is not None
+    async def is_admin(self, user_id: int) -> bool:
+        if not self.initialized:
+            await self.initialize()
+        return self.is_admin_cached(user_id)
+
+    def is_admin_cached(self, user_id: int) -> bool:
+        """فحص فوري من الذاكرة (بدون استعلام) – للاستخدام داخل checks."""
+        return user_id in self.admin_ids
 
     async def get_admins(self):
         rows = await self._fetchall("SELECT user_id, added_at FROM admins ORDER BY added_at")
@@ -378,47 +1439,85 @@ class Database:
     # -----------------------------------------------------------
     # works
     # -----------------------------------------------------------
-    async def add_work(self, name: str, link: str, added_by: str) -> tuple[bool, str]:
-        if not self.initialized:
-            await self.initialize()
+    async def add_work(self, name: str, link: str, added_by: int) -> tuple[bool, str]:
+        normalized = normalize_name(name)
+        if not normalized:
+            return False, "❌ اسم العمل غير صالح"
+
+        async def op():
+            # اسم مختلف في الكتابة فقط (همزة، تشكيل، حالة أحرف) يعتبر نفس العمل
+            if normalized in self.work_ids:
+                return False
+            cursor = await self.write_conn.execute(
+                '''INSERT INTO works (name, link, added_by, created_at, is_active, name_normalized)
+                   VALUES (?, ?, ?, ?, ?, ?)''',
+                (name, link, added_by, self._now(), 1, normalized)
+            )
+            self._cache_work(name, cursor.lastrowid)
+            return True
+
         try:
-            async with self.write_lock:
-                await self.write_conn.execute(
-                    '''INSERT INTO works (name, link, added_by, created_at, is_active)
-                       VALUES (?, ?, ?, ?, ?)''',
-                    (name, link, added_by, self._now(), 1)
-                )
-                await self.write_conn.commit()
-            await self._enqueue_log("add_work", added_by, details={"name": name, "link": link})
-            return True, "✅ تمت الإضافة"
+            added = await self._write(op)
         except Exception:
+            added = False
+        if not added:
             return False, "❌ العمل موجود مسبقاً"
+        await self._enqueue_log("add_work", added_by, details={"name": name, "link": link})
+        return True, "✅ تمت الإضافة"
 
     async def get_work_by_name(self, name: str):
         return await self._fetchone(
-            "SELECT * FROM works WHERE name = ? COLLATE NOCASE AND is_active = 1", (name,)
+            "SELECT * FROM works WHERE name_normalized = ? AND is_active = 1",
+            (normalize_name(name),)
         )
 
     async def get_work_by_id(self, work_id: int):
         return await self._fetchone("SELECT * FROM works WHERE id = ?", (work_id,))
 
     async def search_works(self, query: str):
+        normalized = normalize_name(query)
+        # trigram يحتاج 3 أحرف على الأقل؛ الأقصر يبقى بحث بادئة
+        if self.fts_enabled and len(normalized) >= 3:
+            return await self._search_works_fts(normalized)
+
+        # بحث بادئة كنطاق على الفهرس: [prefix, prefix + أكبر محرف)
+        prefix = normalized
         rows = await self._fetchall(
-            "SELECT * FROM works WHERE name LIKE ? COLLATE NOCASE AND is_active = 1 LIMIT 10",
-            (query + "%",)
+            '''SELECT * FROM works
+               WHERE name_normalized >= ? AND name_normalized < ? AND is_active = 1
+               ORDER BY name_normalized LIMIT 10''',
+            (prefix, prefix + "\U0010ffff")
         )
         return [dict(row) for row in rows]
 
-    async def delete_work(self, name: str, deleted_by: str) -> bool:
-        if not self.initialized:
-            await self.initialize()
-        async with self.write_lock:
+    async def _search_works_fts(self, normalized: str, limit: int = 10):
+        """بحث داخل الاسم (substring) مرتب بـ bm25، ثم بحث تقريبي بالمقاطع الثلاثية."""
+        sql = '''
+            SELECT w.* FROM works_fts f
+            JOIN works w ON w.id = f.rowid
+            WHERE works_fts MATCH ? AND w.is_active = 1
+            ORDER BY bm25(works_fts) LIMIT ?
+        '''
+        phrase = '"' + normalized.replace('"', '""') + '"'
+        rows = await self._fetchall(sql, (phrase, limit), name="search_works_fts")
+        if not rows:
+            # تقريبي: أي مقطع ثلاثي مشترك، الأكثر تطابقاً أولاً
+            trigrams = {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+            fuzzy = " OR ".join('"' + t.replace('"', '""') + '"' for t in sorted(trigrams))
+            rows = await self._fetchall(sql, (fuzzy, limit), name="search_works_fts_fuzzy")
+        return [dict(row) for row in rows]
+
+    async def delete_work(self, name: str, deleted_by: int) -> bool:
+        async def op():
             cursor = await self.write_conn.execute(
-                "UPDATE works SET is_active = 0 WHERE name = ? COLLATE NOCASE AND is_active = 1",
-                (name,)
+                "UPDATE works SET is_active = 0 WHERE name_normalized = ? AND is_active = 1",
+                (normalize_name(name),)
             )
-            await self.write_conn.commit()
-            success = cursor.rowcount > 0
+            if cursor.rowcount > 0:
+                self._uncache_work(name)
+            return cursor.rowcount > 0
+
+        success = await self._write(op)
         if success:
             await self._enqueue_log("delete_work", deleted_by, details={"name": name})
         return success
@@ -426,8 +1525,8 @@ class Database:
     # -----------------------------------------------------------
     # tasks
     # -----------------------------------------------------------
-    async def create_task(self, user_id: str, username: str, display_name: str,
-                          work_name: str, chapter: int, price: int, assigned_by: str) -> tuple[bool, str]:
+    async def create_task(self, user_id: int, username: str, display_name: str,
+                          work_name: str, chapter: int, price: int, assigned_by: int) -> tuple[bool, str]:
         if not self.initialized:
             await self.initialize()
         if price <= 0 or price > 10000:
@@ -435,16 +1534,64 @@ class Database:
         if chapter <= 0:
             return False, "❌ رقم الفصل غير صالح"
 
-        async with self.write_lock:
-            work = await self.write_conn.execute(
-                "SELECT id FROM works WHERE name = ? COLLATE NOCASE AND is_active = 1",
-                (work_name,)
+        async def op():
+            # الكاش يُحدّث داخل عمليات خط الكتابة، لذا القراءة هنا متسقة مع delete_work
+            work_id = self.resolve_work_id(work_name)
+            if work_id is None:
+                return None, False
+
+            await self.write_conn.execute(
+                '''INSERT OR IGNORE INTO users (user_id, username, display_name, joined_at, is_banned)
+                   VALUES (?, ?, ?, ?, ?)''',
+                (user_id, username, display_name or username, self._now(), 0)
+            )
+            cursor = await self.write_conn.execute(
+                '''INSERT OR IGNORE INTO tasks
+                   (user_id, username, display_name, work_id, chapter, price,
+                    status, assigned_by, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                (user_id, username, display_name, work_id, chapter, price,
+                 "pending", assigned_by, self._now())
             )
-            work_row = await work.fetchone()
-            await work.close()
-            if not work_row:
-                return False, "❌ العمل غير موجود"
-            work_id = work_row["id"]
+            created = cursor.rowcount > 0
+            if created:
+                await self._bump_user_stats(user_id, pending=1)
+            return work_id, created
+
+        try:
+            work_id, created = await self._write(op)
+            self._invalidate_team_stats()
+        except Exception as e:
+            logger.error(f"Error creating task: {e}")
+            return False, "❌ حدث خطأ"
+
+        if work_id is None:
+            return False, "❌ العمل غير موجود"
+        if not created:
+            return False, "❌ هذا الفصل مكلف بالفعل"
+        await self._enqueue_log(
+            "create_task", assigned_by, target_id=user_id,
+            details={"work_id": work_id, "chapter": chapter, "price": price}
+        )
+        return True, "✅ تم التكليف"
+
+    async def create_tasks_bulk(self, user_id: int, username: str, display_name: str,
+                                work_name: str, chapters: list[int], price: int,
+                                assigned_by: int) -> tuple[bool, str, list[int], list[int]]:
+        """تكليف عدة فصول دفعة واحدة (executemany في معاملة واحدة).
+
+        تُرجع (نجاح، رسالة، الفصول المكلفة، الفصول المكلفة مسبقاً).
+        """
+        if price <= 0 or price > 10000:
+            return False, "❌ السعر يجب أن يكون بين 1 و 10000", [], []
+        chapters = sorted(set(chapters))
+        if not chapters or chapters[0] <= 0:
+            return False, "❌ رقم الفصل غير صالح", [], []
+
+        async def op():
+            work_id = self.resolve_work_id(work_name)
+            if work_id is None:
+                return None, [], []
 
             await self.write_conn.execute(
                 '''INSERT OR IGNORE INTO users (user_id, username, display_name, joined_at, is_banned)
@@ -452,32 +1599,52 @@ class Database:
                 (user_id, username, display_name or username, self._now(), 0)
             )
 
-            try:
-                cursor = await self.write_conn.execute(
-                    '''INSERT OR IGNORE INTO tasks
-                       (user_id, username, display_name, work_id, chapter, price,
-                        status, assigned_by, created_at)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                    (user_id, username, display_name, work_id, chapter, price,
-                     "pending", assigned_by, self._now())
-                )
-                await self.write_conn.commit()
-                changes = await self.write_conn.execute("SELECT changes()")
-                row_count = (await changes.fetchone())[0]
-                if row_count > 0:
-                    await self._enqueue_log(
-                        "create_task", assigned_by, target_id=user_id,
-                        details={"work_id": work_id, "chapter": chapter, "price": price}
-                    )
-                    return True, "✅ تم التكليف"
-                else:
-                    return False, "❌ هذا الفصل مكلف بالفعل"
-            except Exception as e:
-                await self.write_conn.rollback()
-                logger.error(f"Error creating task: {e}")
-                return False, "❌ حدث خطأ"
+            # الفصول التي تصطدم بـ idx_task_unique_pending
+            placeholders = ",".join("?" * len(chapters))
+            cursor = await self.write_conn.execute(
+                f"""
+                SELECT chapter FROM tasks
+                WHERE user_id = ? AND work_id = ? AND status IN ('pending', 'submitted')
+                  AND chapter IN ({placeholders})
+                """,
+                (user_id, work_id, *chapters)
+            )
+            conflicts = sorted(row["chapter"] for row in await cursor.fetchall())
+            await cursor.close()
+
+            taken = set(conflicts)
+            created = [c for c in chapters if c not in taken]
+            now = self._now()
+            await self.write_conn.executemany(
+                '''INSERT OR IGNORE INTO tasks
+                   (user_id, username, display_name, work_id, chapter, price,
+                    status, assigned_by, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                [(user_id, username, display_name, work_id, c, price,
+                  "pending", assigned_by, now) for c in created]
+            )
+            if created:
+                await self._bump_user_stats(user_id, pending=len(created))
+            return work_id, created, conflicts
 
-    async def get_user_tasks(self, user_id: str, status: str = None):
+        try:
+            work_id, created, conflicts = await self._write(op)
+            self._invalidate_team_stats()
+        except Exception as e:
+            logger.error(f"Error creating bulk tasks: {e}")
+            return False, "❌ حدث خطأ", [], []
+
+        if work_id is None:
+            return False, "❌ العمل غير موجود", [], []
+        if not created:
+            return False, "❌ كل الفصول مكلفة بالفعل", [], conflicts
+        await self._enqueue_log(
+            "create_task_bulk", assigned_by, target_id=user_id,
+            details={"work_id": work_id, "chapters": created, "price": price}
+        )
+        return True, "✅ تم التكليف", created, conflicts
+
+    async def get_user_tasks(self, user_id: int, status: str = None):
         if status:
             rows = await self._fetchall('''
                 SELECT t.*, w.name as work_name
@@ -496,10 +1663,47 @@ class Database:
             ''', (user_id,))
         return [dict(row) for row in rows]
 
-    async def submit_task(self, user_id: str, work_id: int, chapter: int) -> bool:
-        if not self.initialized:
-            await self.initialize()
-        async with self.write_lock:
+    async def get_user_task_counts(self, user_id: int) -> dict[str, int]:
+        """عدد مهام العضو لكل حالة (من الفهرس فقط)."""
+        rows = await self._fetchall(
+            "SELECT status, COUNT(*) FROM tasks WHERE user_id = ? GROUP BY status", (user_id,)
+        )
+        return {row[0]: row[1] for row in rows}
+
+    async def get_user_tasks_page(self, user_id: int, status: str, after: tuple | None = None,
+                                  limit: int = 10) -> tuple[list[dict], tuple | None]:
+        """صفحة واحدة من مهام العضو بحالة معينة، الأحدث أولاً.
+
+        after: مؤشر الصفحة (created_at, id) من الاستدعاء السابق – None للصفحة الأولى.
+        تُرجع (المهام، مؤشر الصفحة التالية أو None إذا لم يبق شيء).
+        """
+        if after is None:
+            rows = await self._fetchall('''
+                SELECT t.*, w.name as work_name
+                FROM tasks t
+                JOIN works w ON t.work_id = w.id
+                WHERE t.user_id = ? AND t.status = ?
+                ORDER BY t.created_at DESC, t.id DESC
+                LIMIT ?
+            ''', (user_id, status, limit + 1))
+        else:
+            rows = await self._fetchall('''
+                SELECT t.*, w.name as work_name
+                FROM tasks t
+                JOIN works w ON t.work_id = w.id
+                WHERE t.user_id = ? AND t.status = ? AND (t.created_at, t.id) < (?, ?)
+                ORDER BY t.created_at DESC, t.id DESC
+                LIMIT ?
+            ''', (user_id, status, after[0], after[1], limit + 1))
+
+        tasks = [dict(row) for row in rows[:limit]]
+        if len(rows) <= limit:
+            return tasks, None
+        last = tasks[-1]
+        return tasks, (int(last["created_at"].timestamp()), last["id"])
+
+    async def submit_task(self, user_id: int, work_id: int, chapter: int) -> bool:
+        async def op():
             cursor = await self.write_conn.execute(
                 """
                 UPDATE tasks
@@ -508,94 +1712,196 @@ class Database:
                 """,
                 ("submitted", self._now(), user_id, work_id, chapter)
             )
-            await self.write_conn.commit()
-            return cursor.rowcount > 0
+            success = cursor.rowcount > 0
+            if success:
+                await self._bump_user_stats(user_id, pending=-1, submitted=1)
+            return success
 
-    async def submit_task_by_name(self, user_id: str, work_name: str, chapter: int) -> bool:
-        work = await self.get_work_by_name(work_name)
-        if not work:
-            return False
-        return await self.submit_task(user_id, work["id"], chapter)
+        success = await self._write(op)
+        self._invalidate_team_stats()
+        return success
 
-    async def approve_task(self, user_id: str, work_id: int, chapter: int, approved_by: str) -> dict | None:
+    async def submit_task_by_name(self, user_id: int, work_name: str, chapter: int) -> bool:
         if not self.initialized:
             await self.initialize()
-        async with self.write_lock:
-            try:
-                await self.write_conn.execute("BEGIN IMMEDIATE")
-
-                cursor = await self.write_conn.execute(
-                    """
-                    SELECT * FROM tasks
-                    WHERE user_id = ? AND work_id = ? AND chapter = ?
-                      AND status = 'submitted' AND approved_at IS NULL
-                    """,
-                    (user_id, work_id, chapter)
-                )
-                task_row = await cursor.fetchone()
-                await cursor.close()
-                if not task_row:
-                    await self.write_conn.execute("ROLLBACK")
-                    return None
-
-                task = dict(task_row)
+        work_id = self.resolve_work_id(work_name)
+        if work_id is None:
+            return False
+        return await self.submit_task(user_id, work_id, chapter)
 
-                if task["price"] is None or task["price"] <= 0:
-                    await self.write_conn.execute("ROLLBACK")
-                    logger.error(f"Task {task['id']} invalid price")
-                    return None
+    async def approve_task(self, user_id: int, work_id: int, chapter: int, approved_by: int) -> dict | None:
+        async def op():
+            cursor = await self.write_conn.execute(
+                """
+                SELECT * FROM tasks
+                WHERE user_id = ? AND work_id = ? AND chapter = ?
+                  AND status = 'submitted' AND approved_at IS NULL
+                """,
+                (user_id, work_id, chapter)
+            )
+            task_row = await cursor.fetchone()
+            await cursor.close()
+            if not task_row:
+                raise _Rollback(None)
 
-                await self.write_conn.execute(
-                    "UPDATE tasks SET status = 'approved', approved_by = ?, approved_at = ? WHERE id = ?",
-                    (approved_by, self._now(), task["id"])
-                )
+            task = dict(task_row)
 
-                # استخدام INSERT OR IGNORE لتجنب الفشل إذا كان الفصل موجودًا بالفعل
-                await self.write_conn.execute(
-                    """
-                    INSERT OR IGNORE INTO chapters
-                    (user_id, username, display_name, work_id, chapter, price, approved_by, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (user_id, task["username"], task["display_name"], work_id, chapter,
-                     task["price"], approved_by, self._now())
-                )
+            if task["price"] is None or task["price"] <= 0:
+                logger.error(f"Task {task['id']} invalid price")
+                raise _Rollback(None)
 
-                changes = await self.write_conn.execute("SELECT changes()")
-                inserted = (await changes.fetchone())[0]
+            await self.write_conn.execute(
+                "UPDATE tasks SET status = 'approved', approved_by = ?, approved_at = ? WHERE id = ?",
+                (approved_by, self._now(), task["id"])
+            )
 
-                if inserted == 0:
-                    # الفصل موجود بالفعل – لا يمكن الموافقة مرة أخرى
-                    await self.write_conn.execute("ROLLBACK")
-                    logger.warning(f"Chapter already exists for {user_id} {work_id} {chapter}")
-                    return None
+            # استخدام INSERT OR IGNORE لتجنب الفشل إذا كان الفصل موجودًا بالفعل
+            cursor = await self.write_conn.execute(
+                """
+                INSERT OR IGNORE INTO chapters
+                (user_id, username, display_name, work_id, chapter, price, approved_by, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (user_id, task["username"], task["display_name"], work_id, chapter,
+                 task["price"], approved_by, self._now())
+            )
 
-                await self.write_conn.commit()
+            if cursor.rowcount == 0:
+                # الفصل موجود بالفعل – لا يمكن الموافقة مرة أخرى
+                logger.warning(f"Chapter already exists for {user_id} {work_id} {chapter}")
+                raise _Rollback(None)
 
-                # تسجيل خارج المعاملة
-                await self._enqueue_log(
-                    "financial_approve", approved_by, target_id=user_id,
-                    details={"work_id": work_id, "chapter": chapter, "price": task["price"]},
-                    log_type="financial"
-                )
-                return task
+            await self._bump_user_stats(user_id, submitted=-1, chapters=1, earned=task["price"])
 
-            except Exception as e:
-                await self.write_conn.execute("ROLLBACK")
-                logger.error(f"Approve task error: {e}")
-                return None
+            # السجل المالي داخل نفس المعاملة: إما يُحفظ مع الفصل أو لا يُحفظ أي منهما
+            await self._insert_log(
+                "financial_approve", approved_by, target_id=user_id,
+                details={"work_id": work_id, "chapter": chapter, "price": task["price"]},
+                log_type="financial"
+            )
+            return task
 
-    async def approve_task_by_name(self, user_id: str, work_name: str, chapter: int, approved_by: str) -> dict | None:
-        work = await self.get_work_by_name(work_name)
-        if not work:
+        try:
+            task = await self._write(op)
+        except Exception as e:
+            logger.error(f"Approve task error: {e}")
             return None
-        return await self.approve_task(user_id, work["id"], chapter, approved_by)
+        self._invalidate_team_stats()
+        if task:
+            self._record_approved([task])
+        return task
 
-    async def reject_task(self, user_id: str, work_id: int, chapter: int,
-                          rejected_by: str, reason: str) -> bool:
+    async def approve_task_by_name(self, user_id: int, work_name: str, chapter: int, approved_by: int) -> dict | None:
         if not self.initialized:
             await self.initialize()
-        async with self.write_lock:
+        work_id = self.resolve_work_id(work_name)
+        if work_id is None:
+            return None
+        return await self.approve_task(user_id, work_id, chapter, approved_by)
+
+    async def approve_tasks_bulk(self, approved_by: int, work_name: str = None,
+                                 user_id: int = None) -> tuple[list[dict], list[dict]] | None:
+        """اعتماد كل المهام المسلمة لعمل و/أو عضو في معاملة واحدة.
+
+        تُرجع (المهام المعتمدة، المهام المتخطاة لأن الفصل موجود مسبقاً)،
+        أو None إذا كان اسم العمل غير صحيح. يجب تحديد عمل أو عضو على الأقل.
+        أخطاء قاعدة البيانات تُمرر للمستدعي (لم يُعتمد شيء).
+        """
+        if work_name is None and user_id is None:
+            # بدون فلتر ستُعتمد كل المهام المسلمة في القاعدة
+            raise ValueError("approve_tasks_bulk needs work_name or user_id")
+        work_id = None
+        if work_name is not None:
+            if not self.initialized:
+                await self.initialize()
+            work_id = self.resolve_work_id(work_name)
+            if work_id is None:
+                return None
+
+        filters = "t.status = 'submitted' AND t.approved_at IS NULL AND t.price > 0"
+        params = []
+        if work_id is not None:
+            filters += " AND t.work_id = ?"
+            params.append(work_id)
+        if user_id is not None:
+            filters += " AND t.user_id = ?"
+            params.append(user_id)
+        chapter_exists = """EXISTS (SELECT 1 FROM chapters c
+                    WHERE c.user_id = t.user_id AND c.work_id = t.work_id AND c.chapter = t.chapter)"""
+
+        async def op():
+            cursor = await self.write_conn.execute(
+                f"""
+                SELECT t.*, w.name AS work_name, {chapter_exists} AS chapter_exists
+                FROM tasks t JOIN works w ON w.id = t.work_id
+                WHERE {filters} ORDER BY t.id
+                """,
+                params
+            )
+            rows = await cursor.fetchall()
+            await cursor.close()
+            approved, skipped = [], []
+            for row in rows:
+                task = dict(row)
+                (skipped if task.pop("chapter_exists") else approved).append(task)
+            if not approved:
+                return approved, skipped
+
+            now = self._now()
+            # إدخال واحد قائم على المجموعات في chapters
+            cursor = await self.write_conn.execute(
+                f"""
+                INSERT INTO chapters
+                (user_id, username, display_name, work_id, chapter, price, approved_by, created_at)
+                SELECT t.user_id, t.username, t.display_name, t.work_id, t.chapter, t.price, ?, ?
+                FROM tasks t WHERE {filters} AND NOT {chapter_exists}
+                """,
+                (approved_by, now, *params)
+            )
+            if cursor.rowcount != len(approved):
+                raise RuntimeError("bulk approve: chapter insert count mismatch")
+
+            await self.write_conn.executemany(
+                "UPDATE tasks SET status = 'approved', approved_by = ?, approved_at = ? WHERE id = ?",
+                [(approved_by, now, task["id"]) for task in approved]
+            )
+
+            per_user = {}
+            for task in approved:
+                count, earned = per_user.get(task["user_id"], (0, 0))
+                per_user[task["user_id"]] = (count + 1, earned + task["price"])
+            for uid, (count, earned) in per_user.items():
+                await self._bump_user_stats(uid, submitted=-count, chapters=count, earned=earned)
+
+            await self._insert_log(
+                "financial_approve_bulk", approved_by, target_id=user_id,
+                details={
+                    "work_id": work_id,
+                    "tasks": [
+                        {"user_id": t["user_id"], "work_id": t["work_id"],
+                         "chapter": t["chapter"], "price": t["price"]}
+                        for t in approved
+                    ],
+                    "total": sum(t["price"] for t in approved)
+                },
+                log_type="financial"
+            )
+            return approved, skipped
+
+        try:
+            result = await self._write(op)
+        except Exception as e:
+            # لا نُرجع قوائم فارغة هنا حتى لا يبدو الفشل كأنه "لا توجد مهام"
+            logger.error(f"Bulk approve error: {e}")
+            raise
+        self._invalidate_team_stats()
+        if result:
+            self._record_approved(result[0])
+        return result
+
+    async def reject_task(self, user_id: int, work_id: int, chapter: int,
+                          rejected_by: int, reason: str) -> bool:
+        async def op():
             cursor = await self.write_conn.execute(
                 """
                 UPDATE tasks
@@ -605,72 +1911,104 @@ class Database:
                 """,
                 (rejected_by, self._now(), reason, user_id, work_id, chapter)
             )
-            await self.write_conn.commit()
-            return cursor.rowcount > 0
+            success = cursor.rowcount > 0
+            if success:
+                await self._bump_user_stats(user_id, submitted=-1)
+            return success
 
-    async def reject_task_by_name(self, user_id: str, work_name: str, chapter: int,
-                                   rejected_by: str, reason: str) -> bool:
-        work = await self.get_work_by_name(work_name)
-        if not work:
+        success = await self._write(op)
+        self._invalidate_team_stats()
+        return success
+
+    async def reject_task_by_name(self, user_id: int, work_name: str, chapter: int,
+                                   rejected_by: int, reason: str) -> bool:
+        if not self.initialized:
+            await self.initialize()
+        work_id = self.resolve_work_id(work_name)
+        if work_id is None:
             return False
-        return await self.reject_task(user_id, work["id"], chapter, rejected_by, reason)
+        return await self.reject_task(user_id, work_id, chapter, rejected_by, reason)
 
     # -----------------------------------------------------------
     # stats
     # -----------------------------------------------------------
-    async def get_user_stats(self, user_id: str):
-        total = await self._fetchone(
-            "SELECT COALESCE(SUM(price), 0) as total, COUNT(*) as count FROM chapters WHERE user_id = ?",
-            (user_id,)
-        )
-        total_earned = total["total"]
-        chapters_count = total["count"]
-
-        recent_rows = await self._fetchall('''
-            SELECT c.*, w.name as work_name
-            FROM chapters c
-            JOIN works w ON c.work_id = w.id
-            WHERE c.user_id = ?
-            ORDER BY c.created_at DESC
-            LIMIT 10
-        ''', (user_id,))
-        recent_list = [dict(row) for row in recent_rows]
-
-        pending = (await self._fetchone(
-            "SELECT COUNT(*) FROM tasks WHERE user_id = ? AND status = 'pending'",
-            (user_id,)
-        ))[0]
-
-        submitted = (await self._fetchone(
-            "SELECT COUNT(*) FROM tasks WHERE user_id = ? AND status = 'submitted'",
-            (user_id,)
-        ))[0]
-
-        user = await self._fetchone(
-            "SELECT display_name FROM users WHERE user_id = ?", (user_id,)
-        )
-        display_name = user["display_name"] if user else None
+    async def get_user_stats(self, user_id: int, include_recent: bool = True):
+        # قراءة نقطية واحدة من user_stats (بدلاً من تجميع chapters و tasks)
+        row = await self._fetchone('''
+            SELECT u.display_name,
+                   COALESCE(s.total_earned, 0) as total_earned,
+                   COALESCE(s.chapters_count, 0) as chapters_count,
+                   COALESCE(s.pending_tasks, 0) as pending_tasks,
+                   COALESCE(s.submitted_tasks, 0) as submitted_tasks
+            FROM users u
+            LEFT JOIN user_stats s ON s.user_id = u.user_id
+            WHERE u.user_id = ?
+        ''', (user_id,), name="get_user_stats")
+
+        recent_list = []
+        if include_recent and row:
+            recent_rows = await self._fetchall('''
+                SELECT c.*, w.name as work_name
+                FROM chapters c
+                JOIN works w ON c.work_id = w.id
+                WHERE c.user_id = ?
+                ORDER BY c.created_at DESC
+                LIMIT 10
+            ''', (user_id,), name="get_user_stats_recent")
+            recent_list = [dict(r) for r in recent_rows]
 
         return {
-            "total_earned": total_earned,
-            "chapters_count": chapters_count,
+            "total_earned": row["total_earned"] if row else 0,
+            "chapters_count": row["chapters_count"] if row else 0,
             "recent_chapters": recent_list,
-            "pending_tasks": pending,
-            "submitted_tasks": submitted,
-            "display_name": display_name
+            "pending_tasks": row["pending_tasks"] if row else 0,
+            "submitted_tasks": row["submitted_tasks"] if row else 0,
+            "display_name": row["display_name"] if row else None
         }
 
+    def _invalidate_team_stats(self):
+        """تُستدعى بعد commit أي كتابة تؤثر على تقرير الفريق."""
+        self._team_stats_version += 1
+
     async def get_team_stats(self):
-        total_chapters = (await self._fetchone("SELECT COUNT(*) FROM chapters"))[0]
-        total_earnings = (await self._fetchone("SELECT COALESCE(SUM(price), 0) FROM chapters"))[0]
-        pending = (await self._fetchone("SELECT COUNT(*) FROM tasks WHERE status = 'pending'"))[0]
-        submitted = (await self._fetchone("SELECT COUNT(*) FROM tasks WHERE status = 'submitted'"))[0]
+        """تقرير الفريق من الكاش ما لم تتغير البيانات أو تنتهِ المدة (TTL).
+
+        الطلبات المتزامنة تنتظر نفس الحساب بدلاً من تكراره (single-flight).
+        """
+        version = self._team_stats_version
+        now = asyncio.get_running_loop().time()
+        cached = self._team_stats_cache
+        if cached and cached[0] == version and now - cached[1] < self.team_stats_ttl:
+            return cached[2]
+
+        inflight = self._team_stats_inflight
+        if inflight is None or inflight[0] != version:
+            task = asyncio.ensure_future(self._refresh_team_stats(version))
+            inflight = self._team_stats_inflight = (version, task)
+        return await asyncio.shield(inflight[1])
+
+    async def _refresh_team_stats(self, version: int):
+        try:
+            stats = await self._compute_team_stats()
+        finally:
+            if self._team_stats_inflight and self._team_stats_inflight[0] == version:
+                self._team_stats_inflight = None
+        # لا نخزن النتيجة إذا حدثت كتابة أثناء الحساب
+        if version == self._team_stats_version:
+            self._team_stats_cache = (version, asyncio.get_running_loop().time(), stats)
+        return stats
+
+    async def _compute_team_stats(self):
+        total_chapters = (await self._fetchone(
+            "SELECT COUNT(*) FROM chapters", name="team_stats_chapters"))[0]
+        total_earnings = (await self._fetchone(
+            "SELECT COALESCE(SUM(price), 0) FROM chapters", name="team_stats_earnings"))[0]
+        pending = (await self._fetchone(
+            "SELECT COUNT(*) FROM tasks WHERE status = 'pending'", name="team_stats_pending"))[0]
+        submitted = (await self._fetchone(
+            "SELECT COUNT(*) FROM tasks WHERE status = 'submitted'", name="team_stats_submitted"))[0]
 
-        rows = await self._fetchall('''
-            SELECT user_id, username, display_name, COUNT(*) as count, COALESCE(SUM(price), 0) as total
-            FROM chapters GROUP BY user_id ORDER BY count DESC LIMIT 5
-        ''')
-        top_users = [dict(row) for row in rows]
+        top_users = await self.get_leaderboard(limit=5)
         return {
             "total_chapters": total_chapters,
             "total_earnings": total_earnings,
@@ -679,30 +2017,416 @@ class Database:
             "top_users": top_users
         }
 
+    async def get_leaderboard(self, scope: str = "all", work_name: str = None,
+                              offset: int = 0, limit: int = 10) -> list[dict] | None:
+        """ترتيب الأعضاء من الذاكرة (بدون SQLite).
+
+        scope: "all" لكل الوقت أو "weekly" لآخر 7 أيام. مع work_name يكون الترتيب لعمل واحد.
+        تُرجع None إذا كان اسم العمل غير صحيح.
+        """
+        if not self.initialized:
+            await self.initialize()
+        if work_name is not None:
+            work_id = self.resolve_work_id(work_name)
+            if work_id is None:
+                return None
+            board = self.work_leaderboards.get(work_id) or Leaderboard()
+        elif scope == "weekly":
+            board = Leaderboard()
+            since = (datetime.utcnow().date() - timedelta(days=7)).isoformat()
+            for day, scores in self._daily_scores.items():
+                if day >= since:
+                    for user_id, (count, earned) in scores.items():
+                        board.add(user_id, count, earned)
+        else:
+            board = self.leaderboard
+
+        result = []
+        for rank, (user_id, count, total) in enumerate(board.page(offset, limit), offset + 1):
+            username, display_name = self.user_names.get(user_id, (None, None))
+            result.append({
+                "rank": rank,
+                "user_id": user_id,
+                "username": username,
+                "display_name": display_name or username or str(user_id),
+                "count": count,
+                "total": total
+            })
+        return result
+
     async def get_weekly_report(self):
-        week_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
+        today = datetime.utcnow().date()
+        return await self.get_report(today - timedelta(days=7), today)
+
+    async def get_report(self, start, end):
+        """تقرير لكل عضو بين يومين (شاملين) من جدول chapters_daily.
+
+        start و end من نوع date أو نص YYYY-MM-DD (بتوقيت UTC).
+        """
         rows = await self._fetchall('''
-            SELECT user_id, username, display_name, COUNT(*) as chapters, COALESCE(SUM(price), 0) as earnings
-            FROM chapters WHERE created_at >= ? GROUP BY user_id ORDER BY chapters DESC
-        ''', (week_ago,))
+            SELECT d.user_id, u.username, u.display_name,
+                   SUM(d.chapters) as chapters, SUM(d.earnings) as earnings
+            FROM chapters_daily d
+            JOIN users u ON u.user_id = d.user_id
+            WHERE d.day >= ? AND d.day <= ?
+            GROUP BY d.user_id
+            HAVING SUM(d.chapters) > 0
+            ORDER BY chapters DESC
+        ''', (str(start), str(end)))
         return [dict(row) for row in rows]
 
+    async def export_rows(self, kind: str, start, end):
+        """بث صفوف التصدير كـ dict لفترة بين يومين (شاملين، بتوقيت UTC).
+
+        kind: "chapters" (الفصول المعتمدة)، "tasks" (المهام المنشأة في الفترة) أو "payroll" (مجموع كل عضو).
+        """
+        start = date.fromisoformat(str(start))
+        end = date.fromisoformat(str(end))
+        if kind == "payroll":
+            sql = '''
+                SELECT d.user_id, u.username, u.display_name,
+                       SUM(d.chapters) as chapters, SUM(d.earnings) as earnings
+                FROM chapters_daily d
+                JOIN users u ON u.user_id = d.user_id
+                WHERE d.day >= ? AND d.day <= ?
+                GROUP BY d.user_id
+                HAVING SUM(d.chapters) > 0
+                ORDER BY earnings DESC
+            '''
+            params = (start.isoformat(), end.isoformat())
+        else:
+            since = int(datetime(start.year, start.month, start.day, tzinfo=timezone.utc).timestamp())
+            until = int(datetime(end.year, end.month, end.day, tzinfo=timezone.utc).timestamp()) + 86400
+            params = (since, until)
+            if kind == "chapters":
+                sql = '''
+                    SELECT c.id, c.user_id, c.username, c.display_name, w.name as work_name,
+                           c.chapter, c.price, c.approved_by, c.created_at
+                    FROM chapters c
+                    JOIN works w ON w.id = c.work_id
+                    WHERE c.created_at >= ? AND c.created_at < ?
+                    ORDER BY c.created_at, c.id
+                '''
+            elif kind == "tasks":
+                sql = '''
+                    SELECT t.id, t.user_id, t.username, t.display_name, w.name as work_name,
+                           t.chapter, t.price, t.status, t.assigned_by, t.created_at,
+                           t.submitted_at, t.approved_at, t.approved_by,
+                           t.rejected_at, t.rejected_by, t.reject_reason
+                    FROM tasks t
+                    JOIN works w ON w.id = t.work_id
+                    WHERE t.created_at >= ? AND t.created_at < ?
+                    ORDER BY t.created_at, t.id
+                '''
+            else:
+                raise ValueError(f"Unknown export kind: {kind}")
+
+        # إغلاق صريح حتى يعود اتصال القراءة فوراً إذا توقف المستهلك في المنتصف
+        async with aclosing(self._iterate(sql, params, name=f"export_{kind}")) as rows:
+            async for row in rows:
+                yield dict(row)
+
+    # -----------------------------------------------------------
+    # فترات الرواتب
+    # -----------------------------------------------------------
+    async def close_pay_period(self, closed_by: int) -> dict | None:
+        """إغلاق الفترة المفتوحة: لقطة لكل عضو من الفصول المعتمدة منذ آخر إغلاق.
+
+        تُرجع ملخص الفترة، أو None إذا لم يُعتمد أي فصل منذ آخر إغلاق.
+        """
+        async def op():
+            cursor = await self.write_conn.execute('''
+                SELECT COALESCE(MAX(last_chapter_id), 0), COALESCE(MAX(end_at), 0) FROM pay_periods
+            ''')
+            first_chapter_id, start_at = await cursor.fetchone()
+            await cursor.close()
+            cursor = await self.write_conn.execute("SELECT COALESCE(MAX(id), 0) FROM chapters")
+            last_chapter_id = (await cursor.fetchone())[0]
+            await cursor.close()
+            if last_chapter_id <= first_chapter_id:
+                raise _Rollback(None)
+            if not start_at:
+                # الفترة الأولى تبدأ من أول فصل معتمد
+                cursor = await self.write_conn.execute("SELECT MIN(created_at) FROM chapters")
+                start_at = (await cursor.fetchone())[0]
+                await cursor.close()
+            end_at = self._now()
+
+            cursor = await self.write_conn.execute(
+                '''INSERT INTO pay_periods (last_chapter_id, start_at, end_at, closed_by, closed_at)
+                   VALUES (?, ?, ?, ?, ?)''',
+                (last_chapter_id, start_at, end_at, closed_by, end_at)
+            )
+            period_id = cursor.lastrowid
+            await self.write_conn.execute('''
+                INSERT INTO pay_period_snapshots (period_id, user_id, chapters, amount)
+                SELECT ?, user_id, COUNT(*), SUM(price)
+                FROM chapters
+                WHERE id > ? AND id <= ?
+                GROUP BY user_id
+            ''', (period_id, first_chapter_id, last_chapter_id))
+
+            cursor = await self.write_conn.execute('''
+                SELECT COUNT(*), COALESCE(SUM(chapters), 0), COALESCE(SUM(amount), 0)
+                FROM pay_period_snapshots WHERE period_id = ?
+            ''', (period_id,))
+            members, chapters, amount = await cursor.fetchone()
+            await cursor.close()
+
+            await self.write_conn.execute('''
+                UPDATE user_stats
+                SET paid_chapters = paid_chapters + s.chapters,
+                    paid_amount = paid_amount + s.amount
+                FROM pay_period_snapshots s
+                WHERE s.period_id = ? AND s.user_id = user_stats.user_id
+            ''', (period_id,))
+
+            await self._insert_log(
+                "close_pay_period", closed_by,
+                details={"period_id": period_id, "members": members, "chapters": chapters, "amount": amount},
+                log_type="financial"
+            )
+            return {
+                "id": period_id,
+                "start_at": _epoch_to_datetime(start_at),
+                "end_at": _epoch_to_datetime(end_at),
+                "members": members,
+                "chapters": chapters,
+                "amount": amount
+            }
+
+        return await self._write(op)
+
+    async def get_pay_periods(self, limit: int = 10) -> list[dict]:
+        """آخر الفترات المغلقة مع مجاميعها، الأحدث أولاً."""
+        rows = await self._fetchall('''
+            SELECT p.id, p.start_at, p.end_at, p.closed_by,
+                   COUNT(s.user_id) as members,
+                   COALESCE(SUM(s.chapters), 0) as chapters,
+                   COALESCE(SUM(s.amount), 0) as amount
+            FROM pay_periods p
+            LEFT JOIN pay_period_snapshots s ON s.period_id = p.id
+            GROUP BY p.id
+            ORDER BY p.id DESC
+            LIMIT ?
+        ''', (limit,))
+        return [dict(row) for row in rows]
+
+    async def get_user_salary(self, user_id: int) -> dict:
+        """راتب العضو: الفترة المفتوحة (غير مدفوعة) + مجموع الفترات المغلقة + آخر فترة.
+
+        كلها قراءات نقطية: user_stats، آخر صف في pay_periods، ولقطة العضو فيها.
+        """
+        row = await self._fetchone('''
+            SELECT u.display_name,
+                   COALESCE(s.total_earned, 0) as total_earned,
+                   COALESCE(s.chapters_count, 0) as chapters_count,
+                   COALESCE(s.paid_amount, 0) as paid_amount,
+                   COALESCE(s.paid_chapters, 0) as paid_chapters
+            FROM users u
+            LEFT JOIN user_stats s ON s.user_id = u.user_id
+            WHERE u.user_id = ?
+        ''', (user_id,), name="get_user_salary")
+        period = await self._fetchone(
+            "SELECT id, end_at FROM pay_periods ORDER BY id DESC LIMIT 1", name="get_user_salary_period"
+        )
+        last = None
+        if period and row:
+            last = await self._fetchone(
+                "SELECT chapters, amount FROM pay_period_snapshots WHERE period_id = ? AND user_id = ?",
+                (period["id"], user_id), name="get_user_salary_snapshot"
+            )
+
+        total_earned = row["total_earned"] if row else 0
+        chapters_count = row["chapters_count"] if row else 0
+        paid_amount = row["paid_amount"] if row else 0
+        paid_chapters = row["paid_chapters"] if row else 0
+        return {
+            "open_amount": total_earned - paid_amount,
+            "open_chapters": chapters_count - paid_chapters,
+            "open_since": period["end_at"] if period else None,
+            "paid_amount": paid_amount,
+            "paid_chapters": paid_chapters,
+            "last_period_amount": last["amount"] if last else 0,
+            "last_period_chapters": last["chapters"] if last else 0,
+            "display_name": row["display_name"] if row else None
+        }
+
     # -----------------------------------------------------------
     # logs management
     # -----------------------------------------------------------
-    async def delete_all_logs(self, user_id: str):
-        if not self.initialized:
-            await self.initialize()
-        async with self.write_lock:
+    async def delete_all_logs(self, user_id: int):
+        # الجدول الرئيسي يحتوي الشهر الحالي + السجلات المالية لكل الأشهر (لا تُحذف)؛
+        # السجلات غير المالية للأشهر السابقة تُحذف كملفات كاملة
+        async def op():
+            await self.write_conn.execute("DELETE FROM logs WHERE type != 'financial'")
+
+        try:
+            await self._write(op)
+        except Exception as e:
+            logger.error(f"Error deleting logs: {e}")
+            return
+        for month in self.log_archive_months():
+            self._drop_log_archive(month)
+        await self._enqueue_log("delete_all_logs", user_id, log_type="admin")
+
+    async def get_logs(self, month: str = None, limit: int = 50) -> list[dict]:
+        """آخر السجلات لشهر معين (YYYY-MM).
+
+        الشهر الحالي من الجدول الرئيسي. الأشهر السابقة من ملف الأرشيف + السجلات المالية
+        (لا تُؤرشف) وأي سجلات لم ينقلها المؤرشف بعد من الجدول الرئيسي.
+        """
+        current = datetime.utcnow().strftime("%Y-%m")
+        if month is None or month == current:
+            rows = await self._fetchall(
+                "SELECT * FROM logs WHERE timestamp >= ? ORDER BY timestamp DESC LIMIT ?",
+                (f"{current}-01", limit)
+            )
+            return [dict(row) for row in rows]
+
+        start, end = self._month_bounds(month)
+        rows = await self._fetchall(
+            "SELECT * FROM logs WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp DESC LIMIT ?",
+            (start, end, limit)
+        )
+        logs = {row["id"]: dict(row) for row in rows}
+
+        path = self._log_archive_path(month)
+        if os.path.exists(path):
+            # فتح ملف الشهر عند الطلب فقط (قراءة فقط)
+            async with aiosqlite.connect(f"file:{path}?mode=ro", uri=True) as conn:
+                conn.row_factory = aiosqlite.Row
+                cursor = await conn.execute(
+                    "SELECT * FROM logs ORDER BY timestamp DESC LIMIT ?", (limit,)
+                )
+                archived = await cursor.fetchall()
+                await cursor.close()
+            for row in archived:
+                logs.setdefault(row["id"], dict(row))
+
+        return sorted(logs.values(), key=lambda log: log["timestamp"], reverse=True)[:limit]
+
+    # -----------------------------------------------------------
+    # أرشيف السجلات الشهري
+    # -----------------------------------------------------------
+    @staticmethod
+    def _month_bounds(month: str) -> tuple[str, str]:
+        """بداية الشهر وبداية الشهر التالي كنص ISO للمقارنة مع timestamp."""
+        year, mon = (int(x) for x in month.split("-"))
+        return f"{month}-01", f"{year + mon // 12:04d}-{mon % 12 + 1:02d}-01"
+
+    def _log_archive_path(self, month: str) -> str:
+        return os.path.join(self.log_archive_dir, f"logs_{month}.db")
+
+    def log_archive_months(self) -> list[str]:
+        if not os.path.isdir(self.log_archive_dir):
+            return []
+        months = []
+        for filename in os.listdir(self.log_archive_dir):
+            if filename.startswith("logs_") and filename.endswith(".db"):
+                months.append(filename[len("logs_"):-len(".db")])
+        return sorted(months)
+
+    def _drop_log_archive(self, month: str):
+        path = self._log_archive_path(month)
+        for suffix in ("", "-wal", "-shm", "-journal"):
             try:
-                await self.write_conn.execute("BEGIN IMMEDIATE")
-                await self.write_conn.execute("DELETE FROM logs WHERE type != 'financial'")
-                await self.write_conn.commit()
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+        logger.info(f"🗑️ Dropped log archive {month}")
+
+    async def _log_archiver(self):
+        """معالج خلفي: نقل سجلات الأشهر المنتهية إلى ملفاتها ثم تطبيق مدة الاحتفاظ."""
+        while True:
+            try:
+                await self.archive_logs()
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                await self.write_conn.execute("ROLLBACK")
-                logger.error(f"Error deleting logs: {e}")
-                return
-        await self._enqueue_log("delete_all_logs", user_id, log_type="admin")
+                logger.error(f"Log archiver error: {e}")
+            await asyncio.sleep(self.log_archive_interval)
+
+    async def archive_logs(self) -> int:
+        """نقل السجلات غير المالية الأقدم من الشهر الحالي إلى ملفات شهرية."""
+        month_start = datetime.utcnow().strftime("%Y-%m-01")
+        rows = await self._fetchall(
+            '''SELECT DISTINCT substr(timestamp, 1, 7) AS month FROM logs
+               WHERE timestamp < ? AND type != 'financial' ''',
+            (month_start,)
+        )
+        moved = 0
+        for row in rows:
+            moved += await self._archive_logs_month(row["month"])
+
+        # الاحتفاظ: حذف ملفات الأشهر الأقدم من الحد كاملة (بدون DELETE)
+        now = datetime.utcnow()
+        index = now.year * 12 + now.month - 1 - self.log_retention_months
+        cutoff = f"{index // 12:04d}-{index % 12 + 1:02d}"
+        for month in self.log_archive_months():
+            if month < cutoff:
+                self._drop_log_archive(month)
+        if moved:
+            logger.info(f"📦 Archived {moved} log entries")
+        return moved
+
+    async def _archive_logs_month(self, month: str) -> int:
+        """نقل سجلات شهر واحد على دفعات صغيرة.
+
+        كل دفعة تُنسخ إلى ملف الشهر أولاً ثم تُحذف من الجدول الرئيسي عبر خط الكتابة.
+        إذا توقف البوت بين الخطوتين تبقى الدفعة في المكانين، والتشغيل التالي يكمل
+        (INSERT OR IGNORE)، و get_logs يتجاهل المكرر.
+        """
+        start, end = self._month_bounds(month)
+        condition = "timestamp >= ? AND timestamp < ? AND type != 'financial'"
+        os.makedirs(self.log_archive_dir, exist_ok=True)
+
+        moved = 0
+        archive = await aiosqlite.connect(self._log_archive_path(month))
+        try:
+            await archive.execute("PRAGMA busy_timeout = 5000;")
+            await archive.execute('''
+                CREATE TABLE IF NOT EXISTS logs (
+                    id INTEGER PRIMARY KEY,
+                    action TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    target_id TEXT,
+                    details TEXT,
+                    timestamp TEXT NOT NULL,
+                    type TEXT DEFAULT 'normal'
+                )
+            ''')
+            await archive.commit()
+            while True:
+                rows = await self._fetchall(
+                    f"""SELECT id, action, user_id, target_id, details, timestamp, type
+                        FROM logs WHERE {condition} ORDER BY id LIMIT ?""",
+                    (start, end, self.log_archive_chunk),
+                    name="archive_logs:read"
+                )
+                if not rows:
+                    break
+                await archive.executemany(
+                    '''INSERT OR IGNORE INTO logs (id, action, user_id, target_id, details, timestamp, type)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                    [tuple(row) for row in rows]
+                )
+                await archive.commit()
+
+                last_id = rows[-1]["id"]
+
+                async def op():
+                    # المعرفات تزداد فقط، فكل ما يطابق الشرط حتى last_id هو نفس الدفعة المنسوخة
+                    await self.write_conn.execute(
+                        f"DELETE FROM logs WHERE {condition} AND id <= ?",
+                        (start, end, last_id)
+                    )
+
+                await self._write(op)
+                moved += len(rows)
+        finally:
+            await archive.close()
+        return moved
 
 
 # -----------------------------------------------------------
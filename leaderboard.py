@@ -0,0 +1,41 @@
+import bisect
+
+
+class Leaderboard:
+    """ترتيب مرتب في الذاكرة: عدد الفصول ثم الأرباح (تنازلياً).
+
+    التحديث بحث ثنائي + إدراج في قائمة مرتبة، والصفحات شرائح مباشرة منها.
+    """
+
+    def __init__(self):
+        self._scores: dict[int, tuple[int, int]] = {}
+        self._order: list[tuple[int, int, int]] = []
+
+    def __len__(self):
+        return len(self._order)
+
+    def add(self, key: int, chapters: int, earnings: int):
+        old = self._scores.get(key)
+        if old is not None:
+            i = bisect.bisect_left(self._order, (-old[0], -old[1], key))
+            del self._order[i]
+            chapters += old[0]
+            earnings += old[1]
+        if chapters <= 0:
+            self._scores.pop(key, None)
+            return
+        self._scores[key] = (chapters, earnings)
+        bisect.insort(self._order, (-chapters, -earnings, key))
+
+    def page(self, offset: int = 0, limit: int = 10) -> list[tuple[int, int, int]]:
+        """[(key, chapters, earnings), ...] مرتبة من الأعلى."""
+        return [(key, -c, -e) for c, e, key in self._order[offset:offset + limit]]
+
+    def rank(self, key: int) -> int | None:
+        score = self._scores.get(key)
+        if score is None:
+            return None
+        return bisect.bisect_left(self._order, (-score[0], -score[1], key)) + 1
+
+    def score(self, key: int) -> tuple[int, int] | None:
+        return self._scores.get(key)
@@ -0,0 +1,178 @@
+import aiohttp
+import asyncio
+import discord
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class _Bucket:
+    """دلو توكنات: rate رسالة لكل per ثانية (نفس فكرة buckets في Discord)."""
+
+    __slots__ = ("rate", "per", "tokens", "updated")
+
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.rate
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) * self.per / self.rate)
+
+
+class Notifier:
+    """إرسال الرسائل الخاصة في الخلفية – الأوامر تضيف للطابور فقط ولا تنتظر Discord.
+
+    رسائل كل عضو تُرسل بالترتيب (العضو يملكه عامل واحد فقط في كل لحظة)، مع حد معدل
+    عام وحد لكل قناة خاصة، وإعادة محاولة بتأخير متزايد، وعدّ الرسائل الفاشلة نهائياً.
+    """
+
+    def __init__(self):
+        self.bot = None
+        self.workers = 4
+        self.max_pending = 1000            # أقصى عدد رسائل في الانتظار (الزائد يُسقط)
+        self.max_attempts = 4
+        self.retry_base = 1.0              # ثوانٍ، تتضاعف مع كل محاولة
+        self.global_bucket = _Bucket(25, 1.0)
+        self.user_rate = (5, 5.0)          # حد Discord لكل قناة
+
+        # الطابور يحمل معرفات الأعضاء الذين لديهم رسائل، وكل عضو مرة واحدة فقط
+        self._ready = asyncio.Queue(maxsize=self.max_pending)
+        self._pending: dict[int, deque[str]] = {}
+        self._size = 0
+        self._user_buckets: dict[int, _Bucket] = {}
+        self._worker_tasks: list[asyncio.Task] = []
+
+        self.dead_letters = deque(maxlen=100)
+        self.stats = {"queued": 0, "sent": 0, "retried": 0, "failed": 0, "dropped": 0}
+
+    def start(self, bot):
+        self.bot = bot
+        if not self._worker_tasks:
+            self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self, timeout: float = 5.0):
+        """انتظار إرسال ما تبقى لمدة محدودة ثم إيقاف العمال."""
+        if self._pending:
+            try:
+                await asyncio.wait_for(self._ready.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Notifier closing with {self._size} unsent DMs")
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def notify(self, user_id: int, content: str) -> bool:
+        """إضافة رسالة خاصة للطابور بدون انتظار. تُرجع False إذا كان الطابور ممتلئاً."""
+        if self._size >= self.max_pending:
+            self.stats["dropped"] += 1
+            logger.warning(f"Notification queue full, dropping DM to {user_id}")
+            return False
+        messages = self._pending.get(user_id)
+        if messages is None:
+            messages = self._pending[user_id] = deque()
+            self._ready.put_nowait(user_id)
+        messages.append(content)
+        self._size += 1
+        self.stats["queued"] += 1
+        return True
+
+    def status(self) -> dict:
+        return {
+            "pending": self._size,
+            "users": len(self._pending),
+            "workers": len(self._worker_tasks),
+            "dead_letters": len(self.dead_letters),
+            **self.stats,
+        }
+
+    async def _worker(self):
+        while True:
+            user_id = await self._ready.get()
+            try:
+                await self._send_next(user_id)
+            except Exception as e:
+                logger.error(f"Notifier worker error: {e}")
+            finally:
+                self._ready.task_done()
+
+    async def _send_next(self, user_id: int):
+        """إرسال أقدم رسالة للعضو ثم إعادته لآخر الطابور إذا بقيت رسائل (عدالة بين الأعضاء)."""
+        messages = self._pending[user_id]
+        content = messages.popleft()
+        self._size -= 1
+        bucket = self._user_buckets.get(user_id)
+        if bucket is None:
+            bucket = self._user_buckets[user_id] = _Bucket(*self.user_rate)
+        try:
+            await self._deliver(user_id, content, bucket)
+        finally:
+            if messages:
+                self._ready.put_nowait(user_id)
+            else:
+                del self._pending[user_id]
+                if bucket.full():
+                    self._user_buckets.pop(user_id, None)
+
+    async def _deliver(self, user_id: int, content: str, bucket: _Bucket):
+        error = None
+        for attempt in range(1, self.max_attempts + 1):
+            await self.global_bucket.acquire()
+            await bucket.acquire()
+            delay = None
+            try:
+                user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+                await user.send(content)
+                self.stats["sent"] += 1
+                return
+            except discord.RateLimited as e:
+                error, delay = e, e.retry_after
+            except discord.HTTPException as e:
+                error = e
+                # Forbidden (الخاص مغلق) و NotFound لن ينجحا مهما أعدنا
+                if e.status != 429 and e.status < 500:
+                    break
+                delay = getattr(e, "retry_after", None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+            except Exception as e:
+                error = e
+                break
+            if attempt < self.max_attempts:
+                self.stats["retried"] += 1
+                await asyncio.sleep(delay or self.retry_base * 2 ** (attempt - 1) * random.uniform(1, 1.5))
+
+        self.stats["failed"] += 1
+        self.dead_letters.append({
+            "user_id": user_id,
+            "content": content,
+            "error": repr(error),
+            "at": datetime.utcnow().isoformat(),
+        })
+        logger.warning(f"DM to {user_id} failed permanently: {error!r}")
+
+
+# -----------------------------------------------------------
+# النسخة العامة
+# -----------------------------------------------------------
+notifier = Notifier()